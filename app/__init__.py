@@ -1,4 +1,4 @@
-__all__ = [
-    "config",
-]
-
+__all__ = [
+    "config",
+]
+
@@ -1,8 +1,6 @@
-from .main import main
-
-if __name__ == "__main__":
-    import asyncio
-
-    asyncio.run(main())
-
-
+from .main import run
+
+if __name__ == "__main__":
+    run()
+
+
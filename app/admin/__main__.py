@@ -0,0 +1,69 @@
+"""Maintenance commands: ``python -m app.admin <command>``."""
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from app.config import load_settings
+from app.db.content import CSV_COLUMNS, merge, read_file, write_file
+from app.db.db import Database
+
+
+async def _rebuild_streaks(db: Database, args: argparse.Namespace) -> None:
+    total = await db.rebuild_streaks()
+    print(f"Rebuilt streak state for {total} users")
+
+
+async def _import_content(db: Database, args: argparse.Namespace) -> None:
+    content = merge(read_file(Path(p)) for p in args.files)
+    report = await db.import_content(content, prune=args.prune, dry_run=args.dry_run)
+    print(("Would import: " if args.dry_run else "Imported: ") + report.summary())
+    if report.changed and not args.dry_run:
+        print("Running bots switch to the new content within CONTENT_POLL_SECONDS (30s by default)")
+
+
+async def _export_content(db: Database, args: argparse.Namespace) -> None:
+    written = write_file(Path(args.file), await db.export_content(), args.kind)
+    print(f"Exported {written} rows to {args.file}")
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.admin")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild-streaks", help="recompute user_streaks from user_practice_log").set_defaults(
+        handler=_rebuild_streaks
+    )
+    imp = sub.add_parser("import-content", help="upsert practices/checklists from .json or .csv files")
+    imp.add_argument("files", nargs="+", help="JSON in the seed format, or CSV with one content kind per file")
+    imp.add_argument("--prune", action="store_true", help="deactivate practices missing from the files")
+    imp.add_argument("--dry-run", action="store_true", help="only report what would change")
+    imp.set_defaults(handler=_import_content)
+    exp = sub.add_parser("export-content", help="write the catalog to a .json or .csv file")
+    exp.add_argument("file")
+    exp.add_argument("--kind", choices=list(CSV_COLUMNS), default="", help="content kind for CSV output")
+    exp.set_defaults(handler=_export_content)
+    return parser
+
+
+async def _run(args: argparse.Namespace) -> None:
+    settings = load_settings()
+    db = Database(db_path=settings.db_path, default_tz=settings.tz)
+    try:
+        await db.init()
+        await args.handler(db, args)
+    finally:
+        await db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+    args = _parser().parse_args(argv)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
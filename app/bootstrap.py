@@ -1,12 +1,13 @@
-from aiogram import Bot
-
-from app.db.db import Database
-from app.services.scheduler import SchedulerService
-from app.context import set_context
-
-
-def attach_context(bot: Bot, db: Database, scheduler: SchedulerService) -> None:
-    # Bot no longer supports item assignment in aiogram >=3.7. Use global context.
-    set_context(db, scheduler)
-
-
+from aiogram import Bot
+
+from app.db.db import Database
+from app.services.reminders import ReminderService
+from app.services.scheduler import SchedulerService
+from app.context import set_context
+
+
+def attach_context(bot: Bot, db: Database, scheduler: SchedulerService, reminders: ReminderService) -> None:
+    # Bot no longer supports item assignment in aiogram >=3.7. Use global context.
+    set_context(db, scheduler, reminders)
+
+
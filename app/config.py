@@ -1,38 +1,125 @@
-import os
-from dataclasses import dataclass
-from typing import List
-
-
-def _parse_admin_ids(value: str) -> List[int]:
-    ids: List[int] = []
-    for part in (value or "").split(","):
-        part = part.strip()
-        if not part:
-            continue
-        try:
-            ids.append(int(part))
-        except ValueError:
-            continue
-    return ids
-
-
-@dataclass
-class Settings:
-    bot_token: str
-    admin_ids: List[int]
-    tz: str
-    db_path: str
-    daily_default_time: str
-
-
-def load_settings() -> Settings:
-    default_db = "/data/bot.db" if os.getenv("RAILWAY_STATIC_URL") or os.getenv("RAILWAY_ENVIRONMENT") else "bot.db"
-    return Settings(
-        bot_token=os.getenv("TELEGRAM_BOT_TOKEN", ""),
-        admin_ids=_parse_admin_ids(os.getenv("ADMIN_IDS", "")),
-        tz=os.getenv("TZ", "Europe/Moscow"),
-        db_path=os.getenv("DB_PATH", default_db),
-        daily_default_time=os.getenv("DAILY_DEFAULT_TIME", "09:00"),
-    )
-
-
+import os
+from dataclasses import dataclass
+from typing import List
+
+
+def _parse_admin_ids(value: str) -> List[int]:
+    ids: List[int] = []
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            ids.append(int(part))
+        except ValueError:
+            continue
+    return ids
+
+
+def _parse_int(value: str, default: int) -> int:
+    try:
+        return int((value or "").strip())
+    except ValueError:
+        return default
+
+
+def _parse_bool(value: str, default: bool) -> bool:
+    value = (value or "").strip().lower()
+    if not value:
+        return default
+    return value in ("1", "true", "yes", "on")
+
+
+def _parse_float(value: str, default: float) -> float:
+    try:
+        return float((value or "").strip())
+    except ValueError:
+        return default
+
+
+@dataclass
+class Settings:
+    bot_token: str
+    admin_ids: List[int]
+    tz: str
+    db_path: str
+    daily_default_time: str
+    daily_batch_size: int = 500
+    broadcast_workers: int = 8
+    broadcast_rate: float = 25.0
+    # write-behind buffer: flush after this many pending rows or this many ms (0 = write-through)
+    write_behind_rows: int = 500
+    write_behind_ms: int = 500
+    db_read_pool_size: int = 2
+    stats_cache_ttl: float = 30.0
+    fsm_cache_size: int = 10_000
+    fsm_ttl_seconds: int = 172_800
+    reminder_batch_size: int = 500
+    # "polling" (default) or "webhook"
+    bot_mode: str = "polling"
+    webhook_url: str = ""
+    webhook_path: str = "/webhook"
+    webhook_secret: str = ""
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    # processes sharing the webhook port (webhook mode only); one of them runs scheduled jobs
+    workers: int = 1
+    leader_lease_ttl: float = 30.0
+    # per-user limit: updates per second, burst size, and window for dropping repeated button taps
+    throttle_rate: float = 2.0
+    throttle_burst: float = 5.0
+    throttle_window: float = 1.0
+    # update ids remembered in memory, and how long they are kept in the database
+    dedupe_window: int = 50_000
+    dedupe_retention_seconds: int = 86_400
+    # Prometheus text endpoint; with several workers each one listens on metrics_port + its index
+    metrics_enabled: bool = True
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9090
+    # per-statement timings; statements slower than db_slow_query_ms are logged with their plan
+    db_profile: bool = False
+    db_slow_query_ms: float = 50.0
+    # how often a running bot checks for content imported by the admin CLI (0 = never)
+    content_poll_seconds: float = 30.0
+
+
+def load_settings() -> Settings:
+    default_db = "/data/bot.db" if os.getenv("RAILWAY_STATIC_URL") or os.getenv("RAILWAY_ENVIRONMENT") else "bot.db"
+    return Settings(
+        bot_token=os.getenv("TELEGRAM_BOT_TOKEN", ""),
+        admin_ids=_parse_admin_ids(os.getenv("ADMIN_IDS", "")),
+        tz=os.getenv("TZ", "Europe/Moscow"),
+        db_path=os.getenv("DB_PATH", default_db),
+        daily_default_time=os.getenv("DAILY_DEFAULT_TIME", "09:00"),
+        daily_batch_size=_parse_int(os.getenv("DAILY_BATCH_SIZE", ""), 500),
+        broadcast_workers=_parse_int(os.getenv("BROADCAST_WORKERS", ""), 8),
+        broadcast_rate=_parse_float(os.getenv("BROADCAST_RATE", ""), 25.0),
+        write_behind_rows=_parse_int(os.getenv("WRITE_BEHIND_ROWS", ""), 500),
+        write_behind_ms=_parse_int(os.getenv("WRITE_BEHIND_MS", ""), 500),
+        db_read_pool_size=_parse_int(os.getenv("DB_READ_POOL_SIZE", ""), 2),
+        stats_cache_ttl=_parse_float(os.getenv("STATS_CACHE_TTL", ""), 30.0),
+        fsm_cache_size=_parse_int(os.getenv("FSM_CACHE_SIZE", ""), 10_000),
+        fsm_ttl_seconds=_parse_int(os.getenv("FSM_TTL_SECONDS", ""), 172_800),
+        reminder_batch_size=_parse_int(os.getenv("REMINDER_BATCH_SIZE", ""), 500),
+        bot_mode=os.getenv("BOT_MODE", "polling").strip().lower(),
+        webhook_url=os.getenv("WEBHOOK_URL", ""),
+        webhook_path=os.getenv("WEBHOOK_PATH", "/webhook"),
+        webhook_secret=os.getenv("WEBHOOK_SECRET", ""),
+        webhook_host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+        webhook_port=_parse_int(os.getenv("WEBHOOK_PORT", "") or os.getenv("PORT", ""), 8080),
+        workers=max(1, _parse_int(os.getenv("WORKERS", ""), 1)),
+        leader_lease_ttl=_parse_float(os.getenv("LEADER_LEASE_TTL", ""), 30.0),
+        throttle_rate=_parse_float(os.getenv("THROTTLE_RATE", ""), 2.0),
+        throttle_burst=_parse_float(os.getenv("THROTTLE_BURST", ""), 5.0),
+        throttle_window=_parse_float(os.getenv("THROTTLE_WINDOW", ""), 1.0),
+        dedupe_window=_parse_int(os.getenv("DEDUPE_WINDOW", ""), 50_000),
+        dedupe_retention_seconds=_parse_int(os.getenv("DEDUPE_RETENTION_SECONDS", ""), 86_400),
+        metrics_enabled=_parse_bool(os.getenv("METRICS_ENABLED", ""), True),
+        metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+        metrics_port=_parse_int(os.getenv("METRICS_PORT", ""), 9090),
+        db_profile=_parse_bool(os.getenv("DB_PROFILE", ""), False),
+        db_slow_query_ms=_parse_float(os.getenv("DB_SLOW_QUERY_MS", ""), 50.0),
+        content_poll_seconds=_parse_float(os.getenv("CONTENT_POLL_SECONDS", ""), 30.0),
+    )
+
+
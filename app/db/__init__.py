@@ -1,3 +1,4 @@
+from .catalog import Catalog
 from .db import Database
 
-__all__ = ["Database"]
+__all__ = ["Catalog", "Database"]
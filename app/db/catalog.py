@@ -0,0 +1,171 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Generic, Iterable, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+# rows per inline keyboard page; well below Telegram's limit on buttons per message
+DEFAULT_PAGE_SIZE = 8
+
+
+class _RowLike:
+    # lets catalog records stand in for aiosqlite.Row in handlers and formatting helpers
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def keys(self) -> List[str]:
+        return [f.name for f in fields(self)]  # type: ignore[arg-type]
+
+
+@dataclass(frozen=True)
+class Category(_RowLike):
+    code: str
+    title: str
+
+
+@dataclass(frozen=True)
+class Practice(_RowLike):
+    id: int
+    category_code: str
+    title: str
+    description: Optional[str]
+    steps_json: Optional[str]
+    timer_seconds: Optional[int]
+    is_active: int
+
+
+@dataclass(frozen=True)
+class ChecklistItem(_RowLike):
+    id: int
+    checklist_code: str
+    title: str
+    order_index: int
+    bit: int
+
+
+@dataclass(frozen=True)
+class Checklist(_RowLike):
+    code: str
+    title: str
+    items: Tuple[ChecklistItem, ...]
+
+    def progress(self, bits: int) -> List[Tuple[int, str, int]]:
+        """(item id, title, done) for each item, read from a user's progress bitset."""
+        return [(i.id, i.title, (bits >> i.bit) & 1) for i in self.items]
+
+
+@dataclass(frozen=True)
+class Page(Generic[T]):
+    items: Tuple[T, ...]
+    has_prev: bool
+    has_next: bool
+
+
+def keyset_page(
+    items: Sequence[T],
+    key: Callable[[T], Any],
+    after: Any = None,
+    before: Any = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page[T]:
+    """Slice of ``items`` (sorted by ``key``) right after or right before a sort key value."""
+    limit = max(1, limit)
+    if before is not None:
+        end = bisect_left(items, before, key=key)
+        start = max(0, end - limit)
+    else:
+        start = bisect_right(items, after, key=key) if after is not None else 0
+        end = start + limit
+    return Page(tuple(items[start:end]), has_prev=start > 0, has_next=end < len(items))
+
+
+def category_key(c: Category) -> Tuple[str, str]:
+    return c.title, c.code
+
+
+def checklist_key(c: "Checklist") -> Tuple[str, str]:
+    return c.title, c.code
+
+
+def practice_key(p: Practice) -> int:
+    # newest first
+    return -p.id
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """Immutable snapshot of the static content. Replaced as a whole, never mutated."""
+
+    version: int
+    categories: Tuple[Category, ...]
+    categories_by_code: Mapping[str, Category]
+    practices_by_id: Mapping[int, Practice]
+    practices_by_category: Mapping[str, Tuple[Practice, ...]]
+    practices_by_title: Mapping[str, Practice]
+    active_practices: Tuple[Practice, ...]
+    checklists: Tuple[Checklist, ...]
+    checklists_by_code: Mapping[str, Checklist]
+    checklist_items_by_id: Mapping[int, ChecklistItem]
+
+    @classmethod
+    def empty(cls) -> "Catalog":
+        return cls.build(0, [], [], [], [])
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        categories: Iterable[Mapping[str, Any]],
+        practices: Iterable[Mapping[str, Any]],
+        checklists: Iterable[Mapping[str, Any]],
+        checklist_items: Iterable[Mapping[str, Any]],
+    ) -> "Catalog":
+        cats = tuple(sorted((Category(c["code"], c["title"]) for c in categories), key=category_key))
+
+        by_id: Dict[int, Practice] = {}
+        for p in practices:
+            timer = p["timer_seconds"]
+            by_id[int(p["id"])] = Practice(
+                id=int(p["id"]),
+                category_code=p["category_code"],
+                title=p["title"],
+                description=p["description"],
+                steps_json=p["steps_json"],
+                timer_seconds=int(timer) if timer is not None else None,
+                is_active=int(p["is_active"]),
+            )
+        active = tuple(p for _, p in sorted(by_id.items()) if p.is_active)
+        by_category: Dict[str, List[Practice]] = {}
+        by_title: Dict[str, Practice] = {}
+        for p in active:
+            by_category.setdefault(p.category_code, []).append(p)
+            by_title.setdefault(p.title, p)
+        # library lists show the newest practices first
+        by_category_sorted = {code: tuple(reversed(items)) for code, items in by_category.items()}
+
+        items_by_code: Dict[str, List[ChecklistItem]] = {}
+        items_by_id: Dict[int, ChecklistItem] = {}
+        for i in checklist_items:
+            item = ChecklistItem(int(i["id"]), i["checklist_code"], i["title"], int(i["order_index"]), int(i["bit"]))
+            items_by_code.setdefault(item.checklist_code, []).append(item)
+            items_by_id[item.id] = item
+        cls_list = []
+        for c in checklists:
+            items = sorted(items_by_code.get(c["code"], []), key=lambda i: (i.order_index, i.id))
+            cls_list.append(Checklist(c["code"], c["title"], tuple(items)))
+        cls_sorted = tuple(sorted(cls_list, key=checklist_key))
+
+        return cls(
+            version=version,
+            categories=cats,
+            categories_by_code=MappingProxyType({c.code: c for c in cats}),
+            practices_by_id=MappingProxyType(by_id),
+            practices_by_category=MappingProxyType(by_category_sorted),
+            practices_by_title=MappingProxyType(by_title),
+            active_practices=active,
+            checklists=cls_sorted,
+            checklists_by_code=MappingProxyType({c.code: c for c in cls_sorted}),
+            checklist_items_by_id=MappingProxyType(items_by_id),
+        )
@@ -0,0 +1,183 @@
+"""Catalog content files: the ``SEED_JSON`` shape as JSON, or one CSV file per kind."""
+import csv
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+Content = Dict[str, List[Dict[str, Any]]]
+
+KINDS = ("categories", "practices", "checklists", "achievements")
+
+# CSV header per kind; on import the kind is recognised from the header
+CSV_COLUMNS: Dict[str, List[str]] = {
+    "categories": ["code", "title"],
+    "practices": ["category_code", "title", "description", "steps", "timer_seconds", "is_active"],
+    "checklists": ["checklist_code", "checklist_title", "item_title"],
+    "achievements": ["code", "title", "description"],
+}
+
+
+def content_hash(content: Mapping[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def merge(parts: Iterable[Content]) -> Content:
+    merged: Content = {}
+    for part in parts:
+        for kind, rows in part.items():
+            merged.setdefault(kind, []).extend(rows)
+    return merged
+
+
+def _key(kind: str, row: Mapping[str, Any]) -> Any:
+    # the stable keys import_content matches rows by
+    if kind == "practices":
+        return row["category_code"], row["title"]
+    return row["code"]
+
+
+def dedupe(content: Content) -> Tuple[Content, int]:
+    """Keep one row per stable key, the last one, and one copy of each checklist item.
+
+    Content merged from several files may repeat a key; inserting it twice would create a second
+    practice or spend another progress bit on the same item. Returns the rows that were dropped.
+    """
+    deduped: Content = {}
+    dropped = 0
+    for kind, rows in content.items():
+        latest: Dict[Any, Dict[str, Any]] = {}
+        for row in rows:
+            key = _key(kind, row)
+            # re-inserted so the surviving row takes the position of the last occurrence
+            latest.pop(key, None)
+            latest[key] = row
+        dropped += len(rows) - len(latest)
+        if kind == "checklists":
+            unique = []
+            for checklist in latest.values():
+                items = list(dict.fromkeys(checklist.get("items", [])))
+                dropped += len(checklist.get("items", [])) - len(items)
+                unique.append({**checklist, "items": items})
+            deduped[kind] = unique
+        else:
+            deduped[kind] = list(latest.values())
+    return deduped, dropped
+
+
+def _optional_int(value: Any) -> Any:
+    value = (value or "").strip()
+    return int(value) if value else None
+
+
+def _csv_rows(kind: str, rows: Iterator[Dict[str, str]]) -> List[Dict[str, Any]]:
+    if kind == "categories":
+        return [{"code": r["code"], "title": r["title"]} for r in rows]
+    if kind == "achievements":
+        return [{"code": r["code"], "title": r["title"], "description": r.get("description") or None} for r in rows]
+    if kind == "practices":
+        out = []
+        for r in rows:
+            practice: Dict[str, Any] = {
+                "category_code": r["category_code"],
+                "title": r["title"],
+                "description": r.get("description") or None,
+                # one step per line inside the quoted cell
+                "steps": [s for s in (r.get("steps") or "").splitlines() if s.strip()],
+                "timer_seconds": _optional_int(r.get("timer_seconds")),
+            }
+            if (r.get("is_active") or "").strip():
+                practice["is_active"] = int(r["is_active"])
+            out.append(practice)
+        return out
+    # checklists: one row per item, items keep the file order
+    checklists: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        checklist = checklists.setdefault(r["checklist_code"], {"code": r["checklist_code"], "title": r["checklist_title"], "items": []})
+        checklist["items"].append(r["item_title"])
+    return list(checklists.values())
+
+
+def _csv_kind(header: Set[str]) -> Optional[str]:
+    if "checklist_code" in header:
+        return "checklists"
+    if "category_code" in header:
+        return "practices"
+    if {"code", "title"} <= header:
+        return "achievements" if "description" in header else "categories"
+    return None
+
+
+def read_file(path: Path) -> Content:
+    if path.suffix.lower() == ".json":
+        with path.open(encoding="utf-8") as f:
+            data = json.load(f)
+        unknown = set(data) - set(KINDS)
+        if unknown:
+            raise ValueError(f"{path}: unknown sections {sorted(unknown)}")
+        return {kind: list(data[kind]) for kind in KINDS if kind in data}
+    if path.suffix.lower() == ".csv":
+        with path.open(encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            kind = _csv_kind(set(reader.fieldnames or []))
+            if kind is None:
+                raise ValueError(f"{path}: cannot tell the content kind from header {reader.fieldnames}")
+            return {kind: _csv_rows(kind, reader)}
+    raise ValueError(f"{path}: expected a .json or .csv file")
+
+
+def write_file(path: Path, content: Content, kind: str = "") -> int:
+    """Write ``content`` to ``path`` (all kinds for JSON, ``kind`` for CSV). Returns rows written."""
+    if path.suffix.lower() == ".json":
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False, indent=2)
+        return sum(len(rows) for rows in content.values())
+    if path.suffix.lower() != ".csv":
+        raise ValueError(f"{path}: expected a .json or .csv file")
+    if kind not in CSV_COLUMNS:
+        raise ValueError(f"CSV export needs one of {list(CSV_COLUMNS)}")
+    written = 0
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS[kind])
+        writer.writeheader()
+        for row in content.get(kind, []):
+            if kind == "checklists":
+                for item in row["items"]:
+                    writer.writerow({"checklist_code": row["code"], "checklist_title": row["title"], "item_title": item})
+                    written += 1
+                continue
+            if kind == "practices":
+                row = {**row, "steps": "\n".join(row.get("steps", []))}
+            writer.writerow({c: row.get(c) for c in CSV_COLUMNS[kind]})
+            written += 1
+    return written
+
+
+@dataclass
+class ImportReport:
+    added: Dict[str, int] = field(default_factory=dict)
+    updated: Dict[str, int] = field(default_factory=dict)
+    unchanged: Dict[str, int] = field(default_factory=dict)
+    deactivated: int = 0
+    # input rows that repeated a stable key and were skipped
+    duplicates: int = 0
+
+    def count(self, bucket: Dict[str, int], kind: str, n: int = 1) -> None:
+        bucket[kind] = bucket.get(kind, 0) + n
+
+    @property
+    def changed(self) -> bool:
+        return bool(sum(self.added.values()) or sum(self.updated.values()) or self.deactivated)
+
+    def summary(self) -> str:
+        parts = []
+        for kind in (*KINDS, "checklist_items"):
+            a, u, s = self.added.get(kind, 0), self.updated.get(kind, 0), self.unchanged.get(kind, 0)
+            if a or u or s:
+                parts.append(f"{kind}: +{a} ~{u} ={s}")
+        if self.deactivated:
+            parts.append(f"practices deactivated: {self.deactivated}")
+        if self.duplicates:
+            parts.append(f"duplicate rows skipped: {self.duplicates}")
+        return "; ".join(parts) or "nothing to import"
@@ -1,586 +1,1163 @@
-import json
-import os
-from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Tuple
-
-import aiosqlite
-
-
-SCHEMA_SQL = """
-PRAGMA journal_mode=WAL;
-
-CREATE TABLE IF NOT EXISTS users (
-    user_id INTEGER PRIMARY KEY,
-    first_name TEXT,
-    username TEXT,
-    points INTEGER NOT NULL DEFAULT 0,
-    daily_time TEXT,
-    daily_enabled INTEGER NOT NULL DEFAULT 1,
-    timezone TEXT,
-    last_daily_sent DATE
-);
-
-CREATE TABLE IF NOT EXISTS categories (
-    code TEXT PRIMARY KEY,
-    title TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS practices (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    category_code TEXT NOT NULL REFERENCES categories(code) ON DELETE CASCADE,
-    title TEXT NOT NULL,
-    description TEXT,
-    steps_json TEXT,
-    timer_seconds INTEGER,
-    is_active INTEGER NOT NULL DEFAULT 1
-);
-
-CREATE TABLE IF NOT EXISTS journal_entries (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    state TEXT NOT NULL,
-    note TEXT,
-    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-);
-
-CREATE TABLE IF NOT EXISTS user_practice_log (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    practice_id INTEGER NOT NULL REFERENCES practices(id) ON DELETE CASCADE,
-    performed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-);
-
-CREATE TABLE IF NOT EXISTS checklists (
-    code TEXT PRIMARY KEY,
-    title TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS checklist_items (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    checklist_code TEXT NOT NULL REFERENCES checklists(code) ON DELETE CASCADE,
-    title TEXT NOT NULL,
-    order_index INTEGER NOT NULL DEFAULT 0
-);
-
-CREATE TABLE IF NOT EXISTS user_checklist_progress (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    checklist_item_id INTEGER NOT NULL REFERENCES checklist_items(id) ON DELETE CASCADE,
-    done INTEGER NOT NULL DEFAULT 0,
-    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(user_id, checklist_item_id)
-);
-
-CREATE TABLE IF NOT EXISTS achievements (
-    code TEXT PRIMARY KEY,
-    title TEXT NOT NULL,
-    description TEXT
-);
-
-CREATE TABLE IF NOT EXISTS user_achievements (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    achievement_code TEXT NOT NULL REFERENCES achievements(code) ON DELETE CASCADE,
-    earned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(user_id, achievement_code)
-);
-"""
-
-
-SEED_JSON = {
-    "categories": [
-        {"code": "body", "title": "Тело"},
-        {"code": "emotion", "title": "Эмоции"},
-        {"code": "mind", "title": "Мышление"},
-        {"code": "attention", "title": "Внимание"}
-    ],
-    "practices": [
-        {
-            "category_code": "body",
-            "title": "Сканирование тела",
-            "steps": [
-                "Сядь удобно, спина прямая, закрой глаза, если хочется.",
-                "Проведи внимание по телу: шея, плечи, челюсть — где есть напряжение?",
-                "Сделай несколько спокойных вдохов и выдохов, отпуская тяжесть."
-            ],
-            "timer_seconds": 60
-        },
-        {
-            "category_code": "mind",
-            "title": "Самодоброта к себе",
-            "steps": [
-                "Скажи вслух: 'Как мне начать лучше с собой обращаться?' и прислушайся к тону.",
-                "Смягчи отношение к себе и повтори фразу ещё раз, наблюдая изменения.",
-                "Сделай несколько спокойных вдохов и выдохов, удерживая доброжелательность к себе."
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "mind",
-            "title": "Несколько версий",
-            "steps": [
-                "Заметь первую трактовку слов другого человека.",
-                "Придумай ещё 2 альтернативные версии происходящего.",
-                "Выбери самую доброжелательную рабочую гипотезу и проверь её вопросом."
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "mind",
-            "title": "Слушай свой голос",
-            "steps": [
-                "Запиши на диктофон короткую фразу-запрос (30–60 сек).",
-                "Прослушай, улови тон: строгий или тёплый к себе?",
-                "Смягчи тон и повтори запись, сравни ощущения."
-            ],
-            "timer_seconds": 120
-        },
-        {
-            "category_code": "attention",
-            "title": "Пять ощущений",
-            "steps": [
-                "Заметь 5 вещей, которые видишь вокруг.",
-                "Заметь 4 вещи, которые можешь потрогать.",
-                "Заметь 3 звука, которые слышишь.",
-                "Обрати внимание на 2 запаха.",
-                "Заметь 1 вкус, который ощущаешь."
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "emotion",
-            "title": "Назови чувство",
-            "steps": [
-                "Сделай короткую паузу и прислушайся к себе.",
-                "Внутри себя спроси: что я чувствую прямо сейчас?",
-                "Назови это чувство мысленно и отметь, где оно ощущается в теле."
-            ],
-            "timer_seconds": 60
-        },
-        {
-            "category_code": "emotion",
-            "title": "Телесная пауза",
-            "steps": [
-                "Сядь удобно и закрой глаза, если хочется.",
-                "Обрати внимание на тело: где чувствуешь необычные ощущения или напряжение?",
-                "Мягко проведи внимание по всему телу сверху вниз.",
-                "Сделай несколько спокойных вдохов и выдохов.",
-                "Просто наблюдай ощущения с интересом, без оценки."
-            ],
-            "timer_seconds": 120
-        },
-        {
-            "category_code": "mind",
-            "title": "Дыхание 4-7-8",
-            "steps": [
-                "Сядь удобно, спина прямая, руки на коленях.",
-                "Сделай вдох через нос, считая до 4.",
-                "Задержи дыхание на счет 7.",
-                "Медленно выдохни через рот на счет 8.",
-                "Повтори несколько раз, чувствуя, как напряжение постепенно уходит."
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "body",
-            "title": "Мягкое движение",
-            "steps": [
-                "Сожми и разожми кулаки несколько раз.",
-                "Потряси плечами и руками, отпуская скованность.",
-                "Сделай лёгкую растяжку: подними руки вверх, аккуратно наклонись в стороны."
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "mind",
-            "title": "Визуализация паузы",
-            "steps": [
-                "Представь, что напряжение — это облако или мяч рядом с тобой.",
-                "Просто наблюдай, как оно медленно уходит, не борясь с ним.",
-                "Почувствуй лёгкость в теле, оставаясь в безопасности."
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "emotion",
-            "title": "Дыхание и заземление",
-            "steps": [
-                "Сядь или встань удобно, закрой глаза, если хочется.",
-                "Сделай несколько глубоких вдохов и выдохов, почувствуй тело.",
-                "Заметь, что тебя окружает через органы чувств: 5 вещей, которые видишь, 4, которые можно потрогать, 3 звука, 2 запаха, 1 вкус."
-            ],
-            "timer_seconds": 120
-        },
-        {
-            "category_code": "body",
-            "title": "Расслабление тела",
-            "steps": [
-                "Ляг или сядь удобно, закрой глаза, если хочется.",
-                "Мягко проведи внимание по телу: стопы, ноги, руки, плечи, шея.",
-                "Сделай несколько глубоких вдохов и выдохов, отпуская напряжение.",
-                "Потянись или слегка встряхни руки и ноги."
-            ],
-            "timer_seconds": 150
-        },
-        {
-            "category_code": "emotion",
-            "title": "Благодарность",
-            "steps": [
-                "Закрой глаза и вспомни 2–3 вещи, за которые ты благодарен сегодня.",
-                "Отметь, как это ощущается в теле.",
-                "Сделай несколько спокойных вдохов и выдохов, сохраняя это чувство."
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "mind",
-            "title": "Парафразирование",
-            "steps": [
-                "Скажи: 'Правильно ли я понял, что…' и кратко перескажи мысль собеседника.",
-                "Попроси подтвердить/уточнить: 'Так ли это?'",
-                "Поправь формулировку без оценок, если нужно."
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "mind",
-            "title": "Уточняющие вопросы",
-            "steps": [
-                "Факт: 'Что именно произошло?'",
-                "Смысл: 'Что для тебя важно в этом?'",
-                "Ожидание: 'Какого результата ты хочешь?'"
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "emotion",
-            "title": "Отражение чувств",
-            "steps": [
-                "Мягко озвучь: 'Звучит так, что тебе сейчас [эмоция]…'",
-                "Спроси: 'Я правильно понимаю?'",
-                "Держи тёплый тон, без советов до подтверждения."
-            ],
-            "timer_seconds": 60
-        },
-        {
-            "category_code": "mind",
-            "title": "Переформулировка",
-            "steps": [
-                "Сожми мысль собеседника до 1–2 фраз без оценок.",
-                "Убери ярлыки и интерпретации, оставь факты и намерение.",
-                "Проверь точность: 'Так точнее?'"
-            ],
-            "timer_seconds": 90
-        },
-        {
-            "category_code": "attention",
-            "title": "Активное слушание",
-            "steps": [
-                "Смотри, молчи, не перебивай — дай пространство.",
-                "Коротко переспрашивай: 'Правильно понимаю, что…?'",
-                "Резюмируй и уточни, не споря."
-            ],
-            "timer_seconds": 120
-        }
-    ],
-    "checklists": [
-        {
-            "code": "grounding",
-            "title": "Заземление",
-            "items": [
-                "Почувствовать стопы на земле",
-                "Мягко расслабить плечи",
-                "Сделать несколько спокойных вдохов"
-            ]
-        }
-    ],
-    "achievements": [
-        {"code": "streak_7", "title": "7 дней подряд", "description": "Практики 7 дней без пропусков"},
-        {"code": "first_journal", "title": "Первая запись", "description": "Сделана первая запись в дневнике"}
-    ]
-}
-
-
-
-class Database:
-    def __init__(self, db_path: str) -> None:
-        self._db_path = db_path
-        self._conn: Optional[aiosqlite.Connection] = None
-
-    @property
-    def path(self) -> str:
-        return self._db_path
-
-    async def connect(self) -> aiosqlite.Connection:
-        if self._conn is None:
-            self._conn = await aiosqlite.connect(self._db_path)
-            await self._conn.execute("PRAGMA foreign_keys = ON;")
-            self._conn.row_factory = aiosqlite.Row
-        return self._conn
-
-    async def init(self) -> None:
-        conn = await self.connect()
-        await conn.executescript(SCHEMA_SQL)
-        await self._seed()
-
-    async def close(self) -> None:
-        if self._conn is not None:
-            await self._conn.close()
-            self._conn = None
-
-    async def _seed(self) -> None:
-        conn = await self.connect()
-        # categories
-        for c in SEED_JSON["categories"]:
-            await conn.execute(
-                "INSERT OR IGNORE INTO categories(code, title) VALUES(?, ?)",
-                (c["code"], c["title"]),
-            )
-        # achievements
-        for a in SEED_JSON["achievements"]:
-            await conn.execute(
-                "INSERT OR IGNORE INTO achievements(code, title, description) VALUES(?, ?, ?)",
-                (a["code"], a["title"], a.get("description")),
-            )
-        # practices
-        for p in SEED_JSON["practices"]:
-            steps_json = json.dumps(p.get("steps", []), ensure_ascii=False)
-            await conn.execute(
-                (
-                    "INSERT INTO practices(category_code, title, description, steps_json, timer_seconds, is_active)\n"
-                    "SELECT ?, ?, ?, ?, ?, 1\n"
-                    "WHERE NOT EXISTS(SELECT 1 FROM practices WHERE title = ? AND category_code = ?)"
-                ),
-                (
-                    p["category_code"],
-                    p["title"],
-                    p.get("description"),
-                    steps_json,
-                    p.get("timer_seconds"),
-                    p["title"],
-                    p["category_code"],
-                ),
-            )
-        # checklists
-        for cl in SEED_JSON["checklists"]:
-            await conn.execute(
-                "INSERT OR IGNORE INTO checklists(code, title) VALUES(?, ?)",
-                (cl["code"], cl["title"]),
-            )
-            for idx, item in enumerate(cl.get("items", [])):
-                await conn.execute(
-                    (
-                        "INSERT INTO checklist_items(checklist_code, title, order_index)\n"
-                        "SELECT ?, ?, ?\n"
-                        "WHERE NOT EXISTS(SELECT 1 FROM checklist_items WHERE checklist_code = ? AND title = ?)"
-                    ),
-                    (cl["code"], item, idx, cl["code"], item),
-                )
-        await conn.commit()
-
-    # User helpers
-    async def upsert_user(self, user_id: int, first_name: Optional[str], username: Optional[str]) -> None:
-        conn = await self.connect()
-        await conn.execute(
-            (
-                "INSERT INTO users(user_id, first_name, username) VALUES(?, ?, ?)\n"
-                "ON CONFLICT(user_id) DO UPDATE SET first_name=excluded.first_name, username=excluded.username"
-            ),
-            (user_id, first_name, username),
-        )
-        await conn.commit()
-
-    async def list_categories(self) -> List[aiosqlite.Row]:
-        conn = await self.connect()
-        async with conn.execute("SELECT code, title FROM categories ORDER BY title") as cur:
-            return await cur.fetchall()
-
-    async def list_practices_by_category(self, category_code: str) -> List[aiosqlite.Row]:
-        conn = await self.connect()
-        async with conn.execute(
-            "SELECT id, title FROM practices WHERE is_active=1 AND category_code=? ORDER BY id DESC",
-            (category_code,),
-        ) as cur:
-            return await cur.fetchall()
-
-    async def get_practice(self, practice_id: int) -> Optional[aiosqlite.Row]:
-        conn = await self.connect()
-        async with conn.execute(
-            "SELECT id, title, description, steps_json, timer_seconds FROM practices WHERE id=?",
-            (practice_id,),
-        ) as cur:
-            row = await cur.fetchone()
-            return row
-
-    async def get_practice_by_title(self, title: str) -> Optional[aiosqlite.Row]:
-        conn = await self.connect()
-        async with conn.execute(
-            "SELECT id, title, description, steps_json, timer_seconds FROM practices WHERE title=? AND is_active=1",
-            (title,),
-        ) as cur:
-            return await cur.fetchone()
-
-    async def random_practice(self) -> Optional[aiosqlite.Row]:
-        conn = await self.connect()
-        async with conn.execute(
-            "SELECT id, title, description, steps_json, timer_seconds FROM practices WHERE is_active=1 ORDER BY RANDOM() LIMIT 1"
-        ) as cur:
-            return await cur.fetchone()
-
-    async def add_journal_entry(self, user_id: int, state: str, note: Optional[str]) -> None:
-        conn = await self.connect()
-        await conn.execute(
-            "INSERT INTO journal_entries(user_id, state, note) VALUES(?, ?, ?)",
-            (user_id, state, note),
-        )
-        await conn.commit()
-
-    async def list_checklists(self) -> List[aiosqlite.Row]:
-        conn = await self.connect()
-        async with conn.execute("SELECT code, title FROM checklists ORDER BY title") as cur:
-            return await cur.fetchall()
-
-    async def list_checklist_items(self, checklist_code: str) -> List[aiosqlite.Row]:
-        conn = await self.connect()
-        async with conn.execute(
-            (
-                "SELECT ci.id, ci.title, IFNULL(ucp.done, 0) as done FROM checklist_items ci\n"
-                "LEFT JOIN user_checklist_progress ucp ON ucp.checklist_item_id = ci.id\n"
-                "     AND ucp.user_id = ?\n"
-                "WHERE ci.checklist_code = ? ORDER BY ci.order_index ASC, ci.id ASC"
-            ),
-            (0, checklist_code),
-        ) as cur:
-            return await cur.fetchall()
-
-    async def toggle_checklist_item(self, user_id: int, item_id: int) -> None:
-        conn = await self.connect()
-        # read current
-        async with conn.execute(
-            "SELECT done FROM user_checklist_progress WHERE user_id=? AND checklist_item_id=?",
-            (user_id, item_id),
-        ) as cur:
-            row = await cur.fetchone()
-        if row is None:
-            await conn.execute(
-                "INSERT INTO user_checklist_progress(user_id, checklist_item_id, done) VALUES(?, ?, 1)",
-                (user_id, item_id),
-            )
-        else:
-            new_done = 0 if int(row["done"]) else 1
-            await conn.execute(
-                "UPDATE user_checklist_progress SET done=?, updated_at=CURRENT_TIMESTAMP WHERE user_id=? AND checklist_item_id=?",
-                (new_done, user_id, item_id),
-            )
-        await conn.commit()
-
-    async def add_points(self, user_id: int, points: int) -> None:
-        conn = await self.connect()
-        await conn.execute(
-            "INSERT INTO users(user_id, points) VALUES(?, ?) ON CONFLICT(user_id) DO UPDATE SET points = points + excluded.points",
-            (user_id, points),
-        )
-        await conn.commit()
-
-    async def set_last_daily_sent(self, user_id: int, date_str: str) -> None:
-        conn = await self.connect()
-        await conn.execute(
-            "UPDATE users SET last_daily_sent=? WHERE user_id=?",
-            (date_str, user_id),
-        )
-        await conn.commit()
-
-    async def list_users_for_daily(self) -> List[int]:
-        conn = await self.connect()
-        async with conn.execute(
-            "SELECT user_id FROM users WHERE IFNULL(daily_enabled,1)=1"
-        ) as cur:
-            rows = await cur.fetchall()
-            return [int(r["user_id"]) for r in rows]
-
-    # Gamification helpers
-    async def log_practice_completion(self, user_id: int, practice_id: int) -> None:
-        conn = await self.connect()
-        await conn.execute(
-            "INSERT INTO user_practice_log(user_id, practice_id) VALUES(?, ?)",
-            (user_id, practice_id),
-        )
-        await conn.commit()
-
-    async def get_user_points(self, user_id: int) -> int:
-        conn = await self.connect()
-        async with conn.execute(
-            "SELECT IFNULL(points,0) as p FROM users WHERE user_id=?",
-            (user_id,),
-        ) as cur:
-            row = await cur.fetchone()
-            return int(row["p"]) if row else 0
-
-    async def grant_achievement(self, user_id: int, code: str) -> bool:
-        conn = await self.connect()
-        try:
-            await conn.execute(
-                "INSERT INTO user_achievements(user_id, achievement_code) VALUES(?, ?)",
-                (user_id, code),
-            )
-            await conn.commit()
-            return True
-        except Exception:
-            return False
-
-    async def list_user_achievements(self, user_id: int) -> List[aiosqlite.Row]:
-        conn = await self.connect()
-        async with conn.execute(
-            (
-                "SELECT ua.achievement_code as code, a.title as title FROM user_achievements ua\n"
-                "JOIN achievements a ON a.code = ua.achievement_code WHERE ua.user_id=? ORDER BY ua.earned_at DESC"
-            ),
-            (user_id,),
-        ) as cur:
-            return await cur.fetchall()
-
-    async def count_journal_entries(self, user_id: int) -> int:
-        conn = await self.connect()
-        async with conn.execute(
-            "SELECT COUNT(*) as c FROM journal_entries WHERE user_id=?",
-            (user_id,),
-        ) as cur:
-            row = await cur.fetchone()
-            return int(row["c"]) if row else 0
-
-    async def count_practice_completions(self, user_id: int) -> int:
-        conn = await self.connect()
-        async with conn.execute(
-            "SELECT COUNT(*) as c FROM user_practice_log WHERE user_id=?",
-            (user_id,),
-        ) as cur:
-            row = await cur.fetchone()
-            return int(row["c"]) if row else 0
-
-    async def get_practice_streak_days(self, user_id: int) -> int:
-        # Calculate consecutive day streak including today if any entry exists today
-        conn = await self.connect()
-        async with conn.execute(
-            (
-                "SELECT DATE(performed_at) as d FROM user_practice_log WHERE user_id=?\n"
-                "AND performed_at >= DATE('now','-21 day') GROUP BY DATE(performed_at) ORDER BY d DESC"
-            ),
-            (user_id,),
-        ) as cur:
-            rows = await cur.fetchall()
-        dates = [row["d"] for row in rows]
-        if not dates:
-            return 0
-        from datetime import date, timedelta
-
-        today = date.today()
-        streak = 0
-        current = today
-        date_set = set(dates)
-        while current.isoformat() in date_set:
-            streak += 1
-            current = current - timedelta(days=1)
-        return streak
-
-
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import aiosqlite
+
+from .content import Content, ImportReport, content_hash, dedupe
+from .catalog import (
+    DEFAULT_PAGE_SIZE,
+    Catalog,
+    Category,
+    Checklist,
+    Page,
+    Practice,
+    category_key,
+    checklist_key,
+    keyset_page,
+    practice_key,
+)
+from .migrations import USER_STREAKS_VERSION, migrate
+from .profiling import QueryProfiler, open_connection
+from .streaks import StreakState, local_day, replay_streaks
+
+
+logger = logging.getLogger(__name__)
+
+
+SEED_JSON = {
+    "categories": [
+        {"code": "body", "title": "Тело"},
+        {"code": "emotion", "title": "Эмоции"},
+        {"code": "mind", "title": "Мышление"},
+        {"code": "attention", "title": "Внимание"}
+    ],
+    "practices": [
+        {
+            "category_code": "body",
+            "title": "Сканирование тела",
+            "steps": [
+                "Сядь удобно, спина прямая, закрой глаза, если хочется.",
+                "Проведи внимание по телу: шея, плечи, челюсть — где есть напряжение?",
+                "Сделай несколько спокойных вдохов и выдохов, отпуская тяжесть."
+            ],
+            "timer_seconds": 60
+        },
+        {
+            "category_code": "mind",
+            "title": "Самодоброта к себе",
+            "steps": [
+                "Скажи вслух: 'Как мне начать лучше с собой обращаться?' и прислушайся к тону.",
+                "Смягчи отношение к себе и повтори фразу ещё раз, наблюдая изменения.",
+                "Сделай несколько спокойных вдохов и выдохов, удерживая доброжелательность к себе."
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "mind",
+            "title": "Несколько версий",
+            "steps": [
+                "Заметь первую трактовку слов другого человека.",
+                "Придумай ещё 2 альтернативные версии происходящего.",
+                "Выбери самую доброжелательную рабочую гипотезу и проверь её вопросом."
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "mind",
+            "title": "Слушай свой голос",
+            "steps": [
+                "Запиши на диктофон короткую фразу-запрос (30–60 сек).",
+                "Прослушай, улови тон: строгий или тёплый к себе?",
+                "Смягчи тон и повтори запись, сравни ощущения."
+            ],
+            "timer_seconds": 120
+        },
+        {
+            "category_code": "attention",
+            "title": "Пять ощущений",
+            "steps": [
+                "Заметь 5 вещей, которые видишь вокруг.",
+                "Заметь 4 вещи, которые можешь потрогать.",
+                "Заметь 3 звука, которые слышишь.",
+                "Обрати внимание на 2 запаха.",
+                "Заметь 1 вкус, который ощущаешь."
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "emotion",
+            "title": "Назови чувство",
+            "steps": [
+                "Сделай короткую паузу и прислушайся к себе.",
+                "Внутри себя спроси: что я чувствую прямо сейчас?",
+                "Назови это чувство мысленно и отметь, где оно ощущается в теле."
+            ],
+            "timer_seconds": 60
+        },
+        {
+            "category_code": "emotion",
+            "title": "Телесная пауза",
+            "steps": [
+                "Сядь удобно и закрой глаза, если хочется.",
+                "Обрати внимание на тело: где чувствуешь необычные ощущения или напряжение?",
+                "Мягко проведи внимание по всему телу сверху вниз.",
+                "Сделай несколько спокойных вдохов и выдохов.",
+                "Просто наблюдай ощущения с интересом, без оценки."
+            ],
+            "timer_seconds": 120
+        },
+        {
+            "category_code": "mind",
+            "title": "Дыхание 4-7-8",
+            "steps": [
+                "Сядь удобно, спина прямая, руки на коленях.",
+                "Сделай вдох через нос, считая до 4.",
+                "Задержи дыхание на счет 7.",
+                "Медленно выдохни через рот на счет 8.",
+                "Повтори несколько раз, чувствуя, как напряжение постепенно уходит."
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "body",
+            "title": "Мягкое движение",
+            "steps": [
+                "Сожми и разожми кулаки несколько раз.",
+                "Потряси плечами и руками, отпуская скованность.",
+                "Сделай лёгкую растяжку: подними руки вверх, аккуратно наклонись в стороны."
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "mind",
+            "title": "Визуализация паузы",
+            "steps": [
+                "Представь, что напряжение — это облако или мяч рядом с тобой.",
+                "Просто наблюдай, как оно медленно уходит, не борясь с ним.",
+                "Почувствуй лёгкость в теле, оставаясь в безопасности."
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "emotion",
+            "title": "Дыхание и заземление",
+            "steps": [
+                "Сядь или встань удобно, закрой глаза, если хочется.",
+                "Сделай несколько глубоких вдохов и выдохов, почувствуй тело.",
+                "Заметь, что тебя окружает через органы чувств: 5 вещей, которые видишь, 4, которые можно потрогать, 3 звука, 2 запаха, 1 вкус."
+            ],
+            "timer_seconds": 120
+        },
+        {
+            "category_code": "body",
+            "title": "Расслабление тела",
+            "steps": [
+                "Ляг или сядь удобно, закрой глаза, если хочется.",
+                "Мягко проведи внимание по телу: стопы, ноги, руки, плечи, шея.",
+                "Сделай несколько глубоких вдохов и выдохов, отпуская напряжение.",
+                "Потянись или слегка встряхни руки и ноги."
+            ],
+            "timer_seconds": 150
+        },
+        {
+            "category_code": "emotion",
+            "title": "Благодарность",
+            "steps": [
+                "Закрой глаза и вспомни 2–3 вещи, за которые ты благодарен сегодня.",
+                "Отметь, как это ощущается в теле.",
+                "Сделай несколько спокойных вдохов и выдохов, сохраняя это чувство."
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "mind",
+            "title": "Парафразирование",
+            "steps": [
+                "Скажи: 'Правильно ли я понял, что…' и кратко перескажи мысль собеседника.",
+                "Попроси подтвердить/уточнить: 'Так ли это?'",
+                "Поправь формулировку без оценок, если нужно."
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "mind",
+            "title": "Уточняющие вопросы",
+            "steps": [
+                "Факт: 'Что именно произошло?'",
+                "Смысл: 'Что для тебя важно в этом?'",
+                "Ожидание: 'Какого результата ты хочешь?'"
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "emotion",
+            "title": "Отражение чувств",
+            "steps": [
+                "Мягко озвучь: 'Звучит так, что тебе сейчас [эмоция]…'",
+                "Спроси: 'Я правильно понимаю?'",
+                "Держи тёплый тон, без советов до подтверждения."
+            ],
+            "timer_seconds": 60
+        },
+        {
+            "category_code": "mind",
+            "title": "Переформулировка",
+            "steps": [
+                "Сожми мысль собеседника до 1–2 фраз без оценок.",
+                "Убери ярлыки и интерпретации, оставь факты и намерение.",
+                "Проверь точность: 'Так точнее?'"
+            ],
+            "timer_seconds": 90
+        },
+        {
+            "category_code": "attention",
+            "title": "Активное слушание",
+            "steps": [
+                "Смотри, молчи, не перебивай — дай пространство.",
+                "Коротко переспрашивай: 'Правильно понимаю, что…?'",
+                "Резюмируй и уточни, не споря."
+            ],
+            "timer_seconds": 120
+        }
+    ],
+    "checklists": [
+        {
+            "code": "grounding",
+            "title": "Заземление",
+            "items": [
+                "Почувствовать стопы на земле",
+                "Мягко расслабить плечи",
+                "Сделать несколько спокойных вдохов"
+            ]
+        }
+    ],
+    "achievements": [
+        {"code": "streak_7", "title": "7 дней подряд", "description": "Практики 7 дней без пропусков"},
+        {"code": "first_journal", "title": "Первая запись", "description": "Сделана первая запись в дневнике"}
+    ]
+}
+
+PRACTICE_POINTS = 3
+# (achievement code, consecutive days required)
+STREAK_ACHIEVEMENTS: Tuple[Tuple[str, int], ...] = (("streak_7", 7),)
+
+
+@dataclass
+class PracticeCompletion:
+    points: int
+    streak: int
+    new_achievements: List[str]
+
+
+@dataclass(frozen=True)
+class UserSummary:
+    points: int = 0
+    practices_done: int = 0
+    journal_entries: int = 0
+    streak: int = 0
+    longest_streak: int = 0
+    achievements: Tuple[str, ...] = ()
+
+
+class _DryRun(Exception):
+    """Raised inside an import transaction to roll it back after the diff is computed."""
+
+
+class WriteBehindBuffer:
+    """Pending writes that are cheap to coalesce and safe to apply a little later."""
+
+    def __init__(self) -> None:
+        # user_id -> accumulated points delta
+        self.points: Dict[int, int] = {}
+        # user_id -> (last_daily_sent, daily_next_at, daily_next_day); only the latest value matters
+        self.daily: Dict[int, Tuple[str, str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.points) + len(self.daily)
+
+    def has_user(self, user_id: int) -> bool:
+        return user_id in self.points or user_id in self.daily
+
+    def merge(self, other: "WriteBehindBuffer") -> None:
+        for uid, delta in other.points.items():
+            self.points[uid] = self.points.get(uid, 0) + delta
+        for uid, value in other.daily.items():
+            self.daily.setdefault(uid, value)
+
+
+@dataclass
+class PoolStats:
+    readers: int = 0
+    acquisitions: int = 0
+    waiting: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.acquisitions if self.acquisitions else 0.0
+
+
+class Database:
+    def __init__(
+        self,
+        db_path: str,
+        flush_rows: int = 500,
+        flush_ms: int = 0,
+        read_pool_size: int = 0,
+        default_tz: str = "UTC",
+        summary_ttl: float = 0.0,
+        busy_timeout_ms: int = 5000,
+        profiler: Optional[QueryProfiler] = None,
+    ) -> None:
+        self._db_path = db_path
+        # opt-in per-statement timings and slow-query log
+        self.profiler = profiler
+        # other worker processes may hold the write lock; wait for it instead of failing
+        self._busy_timeout_ms = max(0, busy_timeout_ms)
+        # used for users without their own timezone when deciding which day an activity belongs to
+        self._default_tz = default_tz
+        # single writer; reads go to a pool of read-only connections when one is configured
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._read_pool_size = 0 if db_path == ":memory:" else max(0, read_pool_size)
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self.pool_stats = PoolStats()
+        self._catalog = Catalog.empty()
+        # meta.content_version the snapshot was read at; bumped by every import that changes content
+        self._content_version: Optional[str] = None
+        # user_id -> (expires_at, summary); every write touching a user drops its entry once committed
+        self._summary_ttl = summary_ttl
+        self._summaries: Dict[int, Tuple[float, UserSummary]] = {}
+        # bumped with every drop, so a read that overlapped a write does not cache what it saw
+        self._summary_generation = 0
+        # flush_ms <= 0 keeps the old write-through behaviour
+        self._flush_rows = max(1, flush_rows)
+        self._flush_ms = flush_ms
+        self._pending = WriteBehindBuffer()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        # held by flush() from taking the buffer until its rows are committed
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._db_path
+
+    async def connect(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            self._conn = await open_connection(self._db_path, self.profiler)
+            await self._conn.execute(f"PRAGMA busy_timeout = {self._busy_timeout_ms};")
+            await self._conn.execute("PRAGMA journal_mode=WAL;")
+            await self._conn.execute("PRAGMA foreign_keys = ON;")
+            self._conn.row_factory = aiosqlite.Row
+        return self._conn
+
+    async def init(self) -> None:
+        conn = await self.connect()
+        applied = await migrate(conn)
+        if USER_STREAKS_VERSION in applied:
+            await self.rebuild_streaks()
+        await self._seed()
+        await self._open_readers()
+        await self.reload_catalog()
+
+    @property
+    def catalog(self) -> Catalog:
+        return self._catalog
+
+    async def reload_catalog(self) -> Catalog:
+        """Re-read categories, practices and checklists and swap the snapshot in one assignment."""
+        async with self._reader() as conn:
+            # read first: an import committing meanwhile then only causes one more reload
+            async with conn.execute("SELECT value FROM meta WHERE key='content_version'") as cur:
+                row = await cur.fetchone()
+            async with conn.execute("SELECT code, title FROM categories") as cur:
+                categories = await cur.fetchall()
+            async with conn.execute(
+                "SELECT id, category_code, title, description, steps_json, timer_seconds, is_active FROM practices"
+            ) as cur:
+                practices = await cur.fetchall()
+            async with conn.execute("SELECT code, title FROM checklists") as cur:
+                checklists = await cur.fetchall()
+            async with conn.execute("SELECT id, checklist_code, title, order_index, bit FROM checklist_items") as cur:
+                items = await cur.fetchall()
+        catalog = Catalog.build(self._catalog.version + 1, categories, practices, checklists, items)
+        self._catalog = catalog
+        self._content_version = row["value"] if row else None
+        return catalog
+
+    async def refresh_catalog(self) -> bool:
+        """Reload the catalog if content was imported since it was loaded, e.g. by another process."""
+        if await self.get_meta("content_version") == self._content_version:
+            return False
+        await self.reload_catalog()
+        return True
+
+    async def _open_readers(self) -> None:
+        if self._idle_readers is not None or not self._read_pool_size:
+            return
+        uri = Path(self._db_path).absolute().as_uri() + "?mode=ro"
+        self._idle_readers = asyncio.Queue()
+        for _ in range(self._read_pool_size):
+            reader = await open_connection(uri, self.profiler, uri=True)
+            await reader.execute(f"PRAGMA busy_timeout = {self._busy_timeout_ms};")
+            reader.row_factory = aiosqlite.Row
+            self._readers.append(reader)
+            self._idle_readers.put_nowait(reader)
+        self.pool_stats.readers = len(self._readers)
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        if self._idle_readers is None:
+            yield await self.connect()
+            return
+        stats = self.pool_stats
+        started = time.perf_counter()
+        stats.waiting += 1
+        try:
+            reader = await self._idle_readers.get()
+        finally:
+            stats.waiting -= 1
+        waited = time.perf_counter() - started
+        stats.acquisitions += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        try:
+            yield reader
+        finally:
+            self._idle_readers.put_nowait(reader)
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._idle_readers = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Requests waiting in each connection's aiosqlite worker queue, by connection."""
+        connections = [("writer", self._conn)] + [(f"reader{i}", r) for i, r in enumerate(self._readers)]
+        depths: Dict[str, int] = {}
+        for name, conn in connections:
+            queue = getattr(conn, "_tx", None)
+            if queue is not None:
+                depths[name] = queue.qsize()
+        return depths
+
+    @asynccontextmanager
+    async def _transaction(self, immediate: bool = False) -> AsyncIterator[aiosqlite.Connection]:
+        # all writes share one connection, so they are serialized to keep transactions from interleaving
+        conn = await self.connect()
+        async with self._write_lock:
+            if immediate:
+                await conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
+
+    @property
+    def write_behind(self) -> bool:
+        return self._flush_ms > 0
+
+    async def _buffered(self) -> None:
+        if len(self._pending) >= self._flush_rows:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self._flush_ms / 1000)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Write-behind flush failed")
+
+    async def _flush_user(self, user_id: int) -> None:
+        # read-your-writes: apply pending rows of this user before reading them back
+        if self._pending.has_user(user_id):
+            await self.flush()
+        elif self._flush_lock.locked():
+            # the user's rows may be in a batch that is being written right now
+            async with self._flush_lock:
+                pass
+
+    async def flush(self) -> None:
+        if not len(self._pending):
+            return
+        async with self._flush_lock:
+            await self._flush_batch()
+
+    async def _flush_batch(self) -> None:
+        if not len(self._pending):
+            return
+        batch, self._pending = self._pending, WriteBehindBuffer()
+        try:
+            async with self._transaction() as conn:
+                if batch.points:
+                    await conn.executemany(
+                        "INSERT INTO users(user_id, points) VALUES(?, ?) ON CONFLICT(user_id) DO UPDATE SET points = points + excluded.points",
+                        list(batch.points.items()),
+                    )
+                if batch.daily:
+                    await conn.executemany(
+                        "UPDATE users SET last_daily_sent=?, daily_next_at=?, daily_next_day=? WHERE user_id=?",
+                        [(sent, next_at, next_day, uid) for uid, (sent, next_at, next_day) in batch.daily.items()],
+                    )
+        except Exception:
+            # keep the rows for the next attempt instead of losing them
+            self._pending.merge(batch)
+            raise
+        for user_id in batch.points:
+            self._invalidate_summary(user_id)
+
+    async def _seed(self) -> None:
+        # the seed only changes with a deploy; skip the diff entirely when it is the one already applied
+        digest = content_hash(SEED_JSON)
+        if await self.get_meta("seed_hash") == digest:
+            return
+        report = await self.import_content(SEED_JSON)
+        await self.set_meta("seed_hash", digest)
+        logger.info("Seed content applied: %s", report.summary())
+
+    async def get_meta(self, key: str) -> Optional[str]:
+        async with self._reader() as conn, conn.execute("SELECT value FROM meta WHERE key=?", (key,)) as cur:
+            row = await cur.fetchone()
+        return row["value"] if row else None
+
+    async def set_meta(self, key: str, value: str) -> None:
+        async with self._transaction() as conn:
+            await conn.execute(
+                "INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (key, value),
+            )
+
+    async def import_content(self, content: Content, prune: bool = False, dry_run: bool = False) -> ImportReport:
+        """Upsert catalog content in one transaction, matching rows by their stable keys.
+
+        Categories, checklists and achievements are keyed by code, practices by
+        (category_code, title) and checklist items by (checklist_code, title). With ``prune``
+        practices missing from ``content`` are deactivated; nothing is ever deleted. A key repeated
+        in ``content`` is imported once, from its last occurrence.
+        """
+        report = ImportReport()
+        content, report.duplicates = dedupe(content)
+        try:
+            async with self._transaction(immediate=True) as conn:
+                async with conn.execute("SELECT code, title FROM categories") as cur:
+                    categories = {r["code"]: r["title"] for r in await cur.fetchall()}
+                async with conn.execute("SELECT code, title, description FROM achievements") as cur:
+                    achievements = {r["code"]: (r["title"], r["description"]) for r in await cur.fetchall()}
+                async with conn.execute(
+                    "SELECT id, category_code, title, description, steps_json, timer_seconds, is_active FROM practices"
+                ) as cur:
+                    practices = {
+                        (r["category_code"], r["title"]): (r["id"], r["description"], r["steps_json"], r["timer_seconds"], r["is_active"])
+                        for r in await cur.fetchall()
+                    }
+                async with conn.execute("SELECT code, title FROM checklists") as cur:
+                    checklists = {r["code"]: r["title"] for r in await cur.fetchall()}
+                async with conn.execute("SELECT id, checklist_code, title, order_index FROM checklist_items") as cur:
+                    items = {(r["checklist_code"], r["title"]): (r["id"], r["order_index"]) for r in await cur.fetchall()}
+                async with conn.execute("SELECT checklist_code, MAX(bit) FROM checklist_items GROUP BY checklist_code") as cur:
+                    next_bit = {r[0]: int(r[1]) + 1 for r in await cur.fetchall() if r[1] is not None}
+
+                upsert_categories = []
+                for c in content.get("categories", []):
+                    old = categories.get(c["code"])
+                    if old == c["title"]:
+                        report.count(report.unchanged, "categories")
+                        continue
+                    report.count(report.updated if old is not None else report.added, "categories")
+                    categories[c["code"]] = c["title"]
+                    upsert_categories.append((c["code"], c["title"]))
+
+                upsert_achievements = []
+                for a in content.get("achievements", []):
+                    new = (a["title"], a.get("description"))
+                    old = achievements.get(a["code"])
+                    if old == new:
+                        report.count(report.unchanged, "achievements")
+                        continue
+                    report.count(report.updated if old is not None else report.added, "achievements")
+                    upsert_achievements.append((a["code"], *new))
+
+                insert_practices, update_practices = [], []
+                seen_practices = set()
+                for p in content.get("practices", []):
+                    key = (p["category_code"], p["title"])
+                    if p["category_code"] not in categories:
+                        raise ValueError(f"practice {p['title']!r}: unknown category {p['category_code']!r}")
+                    seen_practices.add(key)
+                    steps_json = json.dumps(p.get("steps", []), ensure_ascii=False)
+                    old = practices.get(key)
+                    if old is None:
+                        report.count(report.added, "practices")
+                        insert_practices.append(
+                            (*key, p.get("description"), steps_json, p.get("timer_seconds"), int(p.get("is_active", 1)))
+                        )
+                        continue
+                    pid, *old_values = old
+                    # a practice deactivated by hand stays so unless the content says otherwise
+                    new_values = [p.get("description"), steps_json, p.get("timer_seconds"), int(p.get("is_active", old_values[3]))]
+                    if old_values == new_values:
+                        report.count(report.unchanged, "practices")
+                        continue
+                    report.count(report.updated, "practices")
+                    update_practices.append((*new_values, pid))
+                deactivate = []
+                if prune and "practices" in content:
+                    deactivate = [(v[0],) for k, v in practices.items() if k not in seen_practices and v[4]]
+                    report.deactivated = len(deactivate)
+
+                upsert_checklists, insert_items, update_items = [], [], []
+                for cl in content.get("checklists", []):
+                    old = checklists.get(cl["code"])
+                    if old == cl["title"]:
+                        report.count(report.unchanged, "checklists")
+                    else:
+                        report.count(report.updated if old is not None else report.added, "checklists")
+                        upsert_checklists.append((cl["code"], cl["title"]))
+                    for idx, title in enumerate(cl.get("items", [])):
+                        existing = items.get((cl["code"], title))
+                        if existing is None:
+                            # bits are never reused, so stored progress keeps meaning the same items
+                            bit = next_bit.get(cl["code"], 0)
+                            if bit > 62:
+                                raise ValueError(f"checklist {cl['code']!r} has more than 63 items")
+                            next_bit[cl["code"]] = bit + 1
+                            insert_items.append((cl["code"], title, idx, bit))
+                            report.count(report.added, "checklist_items")
+                        elif existing[1] != idx:
+                            update_items.append((idx, existing[0]))
+                            report.count(report.updated, "checklist_items")
+                        else:
+                            report.count(report.unchanged, "checklist_items")
+
+                if dry_run:
+                    raise _DryRun()
+                await conn.executemany(
+                    "INSERT INTO categories(code, title) VALUES(?, ?) ON CONFLICT(code) DO UPDATE SET title=excluded.title",
+                    upsert_categories,
+                )
+                await conn.executemany(
+                    (
+                        "INSERT INTO achievements(code, title, description) VALUES(?, ?, ?)\n"
+                        "ON CONFLICT(code) DO UPDATE SET title=excluded.title, description=excluded.description"
+                    ),
+                    upsert_achievements,
+                )
+                await conn.executemany(
+                    (
+                        "INSERT INTO practices(category_code, title, description, steps_json, timer_seconds, is_active)\n"
+                        "VALUES(?, ?, ?, ?, ?, ?)"
+                    ),
+                    insert_practices,
+                )
+                await conn.executemany(
+                    "UPDATE practices SET description=?, steps_json=?, timer_seconds=?, is_active=? WHERE id=?",
+                    update_practices,
+                )
+                await conn.executemany("UPDATE practices SET is_active=0 WHERE id=?", deactivate)
+                await conn.executemany(
+                    "INSERT INTO checklists(code, title) VALUES(?, ?) ON CONFLICT(code) DO UPDATE SET title=excluded.title",
+                    upsert_checklists,
+                )
+                await conn.executemany(
+                    "INSERT INTO checklist_items(checklist_code, title, order_index, bit) VALUES(?, ?, ?, ?)",
+                    insert_items,
+                )
+                await conn.executemany("UPDATE checklist_items SET order_index=? WHERE id=?", update_items)
+                if report.changed:
+                    await conn.execute(
+                        "INSERT INTO meta(key, value) VALUES('content_version', '1')\n"
+                        "ON CONFLICT(key) DO UPDATE SET value=CAST(value AS INTEGER) + 1"
+                    )
+        except _DryRun:
+            # everything was computed inside the transaction and rolled back
+            return report
+        if report.changed:
+            await self.reload_catalog()
+        return report
+
+    async def export_content(self) -> Content:
+        async with self._reader() as conn:
+            async with conn.execute("SELECT code, title FROM categories ORDER BY code") as cur:
+                categories = [{"code": r["code"], "title": r["title"]} for r in await cur.fetchall()]
+            async with conn.execute(
+                "SELECT category_code, title, description, steps_json, timer_seconds, is_active FROM practices ORDER BY id"
+            ) as cur:
+                practices = [
+                    {
+                        "category_code": r["category_code"],
+                        "title": r["title"],
+                        "description": r["description"],
+                        "steps": json.loads(r["steps_json"]) if r["steps_json"] else [],
+                        "timer_seconds": r["timer_seconds"],
+                        "is_active": r["is_active"],
+                    }
+                    for r in await cur.fetchall()
+                ]
+            async with conn.execute("SELECT code, title FROM checklists ORDER BY code") as cur:
+                checklists = [{"code": r["code"], "title": r["title"], "items": []} for r in await cur.fetchall()]
+            by_code = {c["code"]: c for c in checklists}
+            async with conn.execute(
+                "SELECT checklist_code, title FROM checklist_items ORDER BY checklist_code, order_index, id"
+            ) as cur:
+                for r in await cur.fetchall():
+                    if r["checklist_code"] in by_code:
+                        by_code[r["checklist_code"]]["items"].append(r["title"])
+            async with conn.execute("SELECT code, title, description FROM achievements ORDER BY code") as cur:
+                achievements = [dict(r) for r in await cur.fetchall()]
+        return {"categories": categories, "practices": practices, "checklists": checklists, "achievements": achievements}
+
+    # User helpers
+    async def upsert_user(self, user_id: int, first_name: Optional[str], username: Optional[str]) -> None:
+        async with self._transaction() as conn:
+            await conn.execute(
+                (
+                    "INSERT INTO users(user_id, first_name, username) VALUES(?, ?, ?)\n"
+                    "ON CONFLICT(user_id) DO UPDATE SET first_name=excluded.first_name, username=excluded.username,\n"
+                    # /start after a block: subscribe again and let the scheduler compute the next send
+                    "daily_next_at=CASE WHEN daily_enabled=0 THEN NULL ELSE daily_next_at END, daily_enabled=1"
+                ),
+                (user_id, first_name, username),
+            )
+
+    # Catalog reads are served from the in-memory snapshot
+    async def list_categories(self) -> Sequence[Category]:
+        return self._catalog.categories
+
+    async def list_practices_by_category(self, category_code: str) -> Sequence[Practice]:
+        return self._catalog.practices_by_category.get(category_code, ())
+
+    # Keyset pages: cursors are the code/id of the first or last row of the neighbouring page.
+    # A cursor whose row has disappeared from the catalog restarts from the first page.
+    async def page_categories(
+        self, after: Optional[str] = None, before: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page[Category]:
+        by_code = self._catalog.categories_by_code
+        return keyset_page(
+            self._catalog.categories,
+            category_key,
+            after=category_key(by_code[after]) if after in by_code else None,
+            before=category_key(by_code[before]) if before in by_code else None,
+            limit=limit,
+        )
+
+    async def page_practices(
+        self,
+        category_code: str,
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> Page[Practice]:
+        # ids are their own sort key, so these cursors stay valid even for removed practices
+        return keyset_page(
+            self._catalog.practices_by_category.get(category_code, ()),
+            practice_key,
+            after=-after if after is not None else None,
+            before=-before if before is not None else None,
+            limit=limit,
+        )
+
+    async def page_checklists(
+        self, after: Optional[str] = None, before: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page[Checklist]:
+        by_code = self._catalog.checklists_by_code
+        return keyset_page(
+            self._catalog.checklists,
+            checklist_key,
+            after=checklist_key(by_code[after]) if after in by_code else None,
+            before=checklist_key(by_code[before]) if before in by_code else None,
+            limit=limit,
+        )
+
+    async def get_practice(self, practice_id: int) -> Optional[Practice]:
+        return self._catalog.practices_by_id.get(practice_id)
+
+    async def get_practice_by_title(self, title: str) -> Optional[Practice]:
+        return self._catalog.practices_by_title.get(title)
+
+    async def random_practice(self) -> Optional[Practice]:
+        active = self._catalog.active_practices
+        return random.choice(active) if active else None
+
+    async def add_journal_entry(self, user_id: int, state: str, note: Optional[str]) -> None:
+        async with self._transaction() as conn:
+            await conn.execute(
+                "INSERT INTO journal_entries(user_id, state, note) VALUES(?, ?, ?)",
+                (user_id, state, note),
+            )
+            await conn.execute(
+                "INSERT INTO users(user_id, journal_count) VALUES(?, 1) ON CONFLICT(user_id) DO UPDATE SET journal_count = journal_count + 1",
+                (user_id,),
+            )
+        self._invalidate_summary(user_id)
+
+    async def list_checklists(self) -> Sequence[Checklist]:
+        return self._catalog.checklists
+
+    async def get_checklist_bits(self, user_id: int, checklist_code: str) -> int:
+        async with self._reader() as conn, conn.execute(
+            "SELECT bits FROM user_checklists WHERE user_id=? AND checklist_code=?",
+            (user_id, checklist_code),
+        ) as cur:
+            row = await cur.fetchone()
+        return int(row["bits"]) if row else 0
+
+    async def list_checklist_items(self, user_id: int, checklist_code: str) -> List[Tuple[int, str, int]]:
+        checklist = self._catalog.checklists_by_code.get(checklist_code)
+        if checklist is None:
+            return []
+        return checklist.progress(await self.get_checklist_bits(user_id, checklist_code))
+
+    async def toggle_checklist_item(self, user_id: int, item_id: int) -> Optional[int]:
+        """Flip one item and return the user's new bitset for its checklist (None for an unknown item)."""
+        item = self._catalog.checklist_items_by_id.get(item_id)
+        if item is None:
+            return None
+        # SQLite has no XOR operator: (a | b) - (a & b) flips the item's bit
+        async with self._transaction() as conn, conn.execute(
+            (
+                "INSERT INTO user_checklists(user_id, checklist_code, bits) VALUES(?, ?, ?)\n"
+                "ON CONFLICT(user_id, checklist_code) DO UPDATE SET bits = (bits | excluded.bits) - (bits & excluded.bits), updated_at=CURRENT_TIMESTAMP\n"
+                "RETURNING bits"
+            ),
+            (user_id, item.checklist_code, 1 << item.bit),
+        ) as cur:
+            row = await cur.fetchone()
+        return int(row["bits"])
+
+    async def add_points(self, user_id: int, points: int) -> None:
+        if self.write_behind:
+            # get_user_summary flushes the user's buffered writes before reading
+            self._pending.points[user_id] = self._pending.points.get(user_id, 0) + points
+            self._invalidate_summary(user_id)
+            await self._buffered()
+            return
+        async with self._transaction() as conn:
+            await conn.execute(
+                "INSERT INTO users(user_id, points) VALUES(?, ?) ON CONFLICT(user_id) DO UPDATE SET points = points + excluded.points",
+                (user_id, points),
+            )
+        self._invalidate_summary(user_id)
+
+    async def set_last_daily_sent(self, user_id: int, date_str: str, next_at: str, next_day: str) -> None:
+        if self.write_behind:
+            self._pending.daily[user_id] = (date_str, next_at, next_day)
+            await self._buffered()
+            return
+        async with self._transaction() as conn:
+            await conn.execute(
+                "UPDATE users SET last_daily_sent=?, daily_next_at=?, daily_next_day=? WHERE user_id=?",
+                (date_str, next_at, next_day, user_id),
+            )
+
+    async def set_daily_next(self, items: Sequence[Tuple[int, str, str]]) -> None:
+        # items: (user_id, next_at, next_day)
+        async with self._transaction() as conn:
+            await conn.executemany(
+                "UPDATE users SET daily_next_at=?, daily_next_day=? WHERE user_id=?",
+                [(next_at, next_day, uid) for uid, next_at, next_day in items],
+            )
+
+    async def disable_daily(self, user_id: int) -> None:
+        async with self._transaction() as conn:
+            await conn.execute("UPDATE users SET daily_enabled=0 WHERE user_id=?", (user_id,))
+        logger.info("Daily practice disabled for user %s: bot is blocked; /start enables it again", user_id)
+
+    async def list_users_unscheduled_daily(self, limit: int) -> List[aiosqlite.Row]:
+        async with self._reader() as conn, conn.execute(
+            (
+                "SELECT user_id, daily_time, timezone FROM users\n"
+                "WHERE daily_next_at IS NULL AND IFNULL(daily_enabled,1)=1 LIMIT ?"
+            ),
+            (limit,),
+        ) as cur:
+            return await cur.fetchall()
+
+    async def list_users_due_daily(self, now_utc: str, after: Tuple[str, int], limit: int) -> List[aiosqlite.Row]:
+        # daily_next_day is the user's local date of the pending send; a match with
+        # last_daily_sent means that send already happened and must not repeat
+        async with self._reader() as conn, conn.execute(
+            (
+                "SELECT user_id, daily_time, timezone, daily_next_at, daily_next_day FROM users\n"
+                "WHERE daily_next_at <= ? AND (daily_next_at, user_id) > (?, ?) AND IFNULL(daily_enabled,1)=1\n"
+                "AND IFNULL(last_daily_sent,'') <> daily_next_day ORDER BY daily_next_at, user_id LIMIT ?"
+            ),
+            (now_utc, *after, limit),
+        ) as cur:
+            return await cur.fetchall()
+
+    async def iter_users_due_daily(self, now_utc: str, batch_size: int = 500) -> AsyncIterator[aiosqlite.Row]:
+        """Yield every user due for the daily push, one keyset page on ``(daily_next_at, user_id)`` at a time.
+
+        A reader is held only while a page is fetched, so a slow consumer pins neither a pooled
+        connection nor more than one page of rows.
+        """
+        after = ("", 0)
+        while True:
+            rows = await self.list_users_due_daily(now_utc, after, batch_size)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]["daily_next_at"], int(rows[-1]["user_id"]))
+
+    # Gamification helpers
+    @staticmethod
+    def _streak_from_row(row: Optional[aiosqlite.Row]) -> StreakState:
+        if row is None:
+            return StreakState()
+        last = row["last_active_day"]
+        return StreakState(
+            current=int(row["current_streak"]),
+            longest=int(row["longest_streak"]),
+            last_active_day=date.fromisoformat(last) if last else None,
+        )
+
+    async def _record_streak_day(self, conn: aiosqlite.Connection, user_id: int, moment: datetime) -> StreakState:
+        # O(1) per completion: advance the stored state instead of rescanning the log
+        async with conn.execute(
+            "SELECT current_streak, longest_streak, last_active_day FROM user_streaks WHERE user_id=?",
+            (user_id,),
+        ) as cur:
+            state = self._streak_from_row(await cur.fetchone())
+        async with conn.execute("SELECT timezone FROM users WHERE user_id=?", (user_id,)) as cur:
+            user = await cur.fetchone()
+        tz_name = user["timezone"] if user else None
+        new_state = state.advance(local_day(moment, tz_name, self._default_tz))
+        if new_state is not state:
+            await conn.execute(
+                (
+                    "INSERT INTO user_streaks(user_id, current_streak, longest_streak, last_active_day) VALUES(?, ?, ?, ?)\n"
+                    "ON CONFLICT(user_id) DO UPDATE SET current_streak=excluded.current_streak,\n"
+                    "longest_streak=excluded.longest_streak, last_active_day=excluded.last_active_day"
+                ),
+                (user_id, new_state.current, new_state.longest, new_state.last_active_day.isoformat()),
+            )
+        return new_state
+
+    async def rebuild_streaks(self) -> int:
+        """Backfill user_streaks from user_practice_log. Returns the number of users processed."""
+        await self.flush()
+        total = 0
+        async with self._transaction() as conn:
+            await conn.execute("DELETE FROM user_streaks")
+            batch: List[Tuple[int, int, int, str]] = []
+            async for uid, state in replay_streaks(conn, self._default_tz):
+                batch.append((uid, state.current, state.longest, state.last_active_day.isoformat()))
+                if len(batch) >= 500:
+                    await self._insert_streaks(conn, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                await self._insert_streaks(conn, batch)
+                total += len(batch)
+        return total
+
+    @staticmethod
+    async def _insert_streaks(conn: aiosqlite.Connection, rows: Sequence[Tuple[int, int, int, str]]) -> None:
+        await conn.executemany(
+            "INSERT INTO user_streaks(user_id, current_streak, longest_streak, last_active_day) VALUES(?, ?, ?, ?)",
+            rows,
+        )
+
+    async def complete_practice(self, user_id: int, practice_id: int, points: int = PRACTICE_POINTS) -> PracticeCompletion:
+        """Log a completion, award points and streak achievements in a single transaction."""
+        # points buffered earlier (e.g. from the minigame) must be part of the total we report
+        await self._flush_user(user_id)
+        async with self._transaction(immediate=True) as conn:
+            await conn.execute(
+                "INSERT INTO user_practice_log(user_id, practice_id) VALUES(?, ?)",
+                (user_id, practice_id),
+            )
+            await conn.execute(
+                (
+                    "INSERT INTO users(user_id, points, practices_done) VALUES(?, ?, 1)\n"
+                    "ON CONFLICT(user_id) DO UPDATE SET points = points + excluded.points, practices_done = practices_done + 1"
+                ),
+                (user_id, points),
+            )
+            state = await self._record_streak_day(conn, user_id, datetime.now(timezone.utc))
+            streak = state.current
+            earned: List[str] = []
+            for code, days in STREAK_ACHIEVEMENTS:
+                if streak < days:
+                    continue
+                cur = await conn.execute(
+                    "INSERT OR IGNORE INTO user_achievements(user_id, achievement_code) VALUES(?, ?)",
+                    (user_id, code),
+                )
+                if cur.rowcount > 0:
+                    earned.append(code)
+            async with conn.execute("SELECT points FROM users WHERE user_id=?", (user_id,)) as cur:
+                row = await cur.fetchone()
+        self._invalidate_summary(user_id)
+        return PracticeCompletion(points=int(row["points"]) if row else 0, streak=streak, new_achievements=earned)
+
+    def _invalidate_summary(self, user_id: int) -> None:
+        # called after the write is committed (or buffered), never before: a read in between
+        # would cache the old values again for the whole TTL
+        self._summary_generation += 1
+        self._summaries.pop(user_id, None)
+
+    async def get_user_summary(self, user_id: int) -> UserSummary:
+        """Everything /stats shows, read from the maintained counters in one query."""
+        now = time.monotonic()
+        cached = self._summaries.get(user_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        generation = self._summary_generation
+        await self._flush_user(user_id)
+        async with self._reader() as conn, conn.execute(
+            (
+                "SELECT u.points, u.practices_done, u.journal_count, u.timezone,\n"
+                "       s.current_streak, s.longest_streak, s.last_active_day,\n"
+                "       (SELECT group_concat(title, char(31)) FROM (\n"
+                "            SELECT a.title FROM user_achievements ua JOIN achievements a ON a.code = ua.achievement_code\n"
+                "            WHERE ua.user_id = u.user_id ORDER BY ua.earned_at DESC)) AS achievements\n"
+                "FROM users u LEFT JOIN user_streaks s ON s.user_id = u.user_id WHERE u.user_id=?"
+            ),
+            (user_id,),
+        ) as cur:
+            row = await cur.fetchone()
+        if row is None:
+            summary = UserSummary()
+        else:
+            streak = self._streak_from_row(row if row["current_streak"] is not None else None)
+            today = local_day(datetime.now(timezone.utc), row["timezone"], self._default_tz)
+            summary = UserSummary(
+                points=int(row["points"] or 0),
+                practices_done=int(row["practices_done"] or 0),
+                journal_entries=int(row["journal_count"] or 0),
+                streak=streak.current_on(today),
+                longest_streak=streak.longest,
+                achievements=tuple(row["achievements"].split(chr(31))) if row["achievements"] else (),
+            )
+        if self._summary_ttl > 0 and generation == self._summary_generation:
+            if len(self._summaries) >= 10_000:
+                self._summaries = {uid: item for uid, item in self._summaries.items() if item[0] > now}
+            self._summaries[user_id] = (now + self._summary_ttl, summary)
+        return summary
+
+    async def upsert_reminder(self, user_id: int, practice_id: int, due_at: int) -> None:
+        # one pending reminder per practice: asking again moves it instead of adding another
+        async with self._transaction() as conn:
+            await conn.execute(
+                (
+                    "INSERT INTO reminders(user_id, practice_id, due_at) VALUES(?, ?, ?)\n"
+                    "ON CONFLICT(user_id, practice_id) DO UPDATE SET due_at=excluded.due_at"
+                ),
+                (user_id, practice_id, due_at),
+            )
+
+    async def list_reminders(self, due_before: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        # (due_at, user_id, practice_id), ready to be heapified
+        sql = "SELECT due_at, user_id, practice_id FROM reminders"
+        params: Tuple[Any, ...] = ()
+        if due_before is not None:
+            sql += " WHERE due_at <= ?"
+            params = (due_before,)
+        async with self._reader() as conn, conn.execute(sql, params) as cur:
+            return [(int(r[0]), int(r[1]), int(r[2])) for r in await cur.fetchall()]
+
+    async def delete_reminders(self, items: Sequence[Tuple[int, int, int]]) -> None:
+        # items: (due_at, user_id, practice_id); a reminder moved in the meantime has another due_at and stays
+        async with self._transaction() as conn:
+            await conn.executemany(
+                "DELETE FROM reminders WHERE user_id=? AND practice_id=? AND due_at=?",
+                [(uid, pid, due_at) for due_at, uid, pid in items],
+            )
+
+    async def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        """Take or renew lease ``name`` for ``holder``; fails while another holder's lease is live."""
+        now = time.time()
+        async with self._transaction(immediate=True) as conn:
+            await conn.execute(
+                (
+                    "INSERT INTO leases(name, holder, expires_at) VALUES(?, ?, ?)\n"
+                    "ON CONFLICT(name) DO UPDATE SET holder=excluded.holder, expires_at=excluded.expires_at\n"
+                    "WHERE leases.holder = excluded.holder OR leases.expires_at < ?"
+                ),
+                (name, holder, now + ttl, now),
+            )
+            async with conn.execute("SELECT holder FROM leases WHERE name=?", (name,)) as cur:
+                row = await cur.fetchone()
+        return row is not None and row["holder"] == holder
+
+    async def release_lease(self, name: str, holder: str) -> None:
+        async with self._transaction() as conn:
+            await conn.execute("DELETE FROM leases WHERE name=? AND holder=?", (name, holder))
+
+    # Update dedupe backend (see app/db/dedupe.py)
+    async def dedupe_load(self, since: int, limit: int) -> List[Tuple[str, int]]:
+        async with self._reader() as conn, conn.execute(
+            "SELECT key, seen_at FROM processed_updates WHERE seen_at >= ? ORDER BY seen_at DESC LIMIT ?",
+            (since, limit),
+        ) as cur:
+            return [(r[0], int(r[1])) for r in await cur.fetchall()]
+
+    async def dedupe_save(self, items: Sequence[Tuple[str, int]]) -> None:
+        async with self._transaction() as conn:
+            await conn.executemany("INSERT OR IGNORE INTO processed_updates(key, seen_at) VALUES(?, ?)", items)
+
+    async def dedupe_claim(self, keys: Sequence[str], seen_at: int) -> bool:
+        """Record ``keys`` as processed; False if any of them was already there."""
+        async with self._transaction() as conn:
+            fresh = True
+            for key in keys:
+                cur = await conn.execute("INSERT OR IGNORE INTO processed_updates(key, seen_at) VALUES(?, ?)", (key, seen_at))
+                fresh = fresh and cur.rowcount == 1
+            return fresh
+
+    async def dedupe_purge(self, before: int) -> int:
+        async with self._transaction() as conn:
+            cur = await conn.execute("DELETE FROM processed_updates WHERE seen_at < ?", (before,))
+            return cur.rowcount
+
+    # FSM storage backend (see app/db/fsm.py)
+    async def fsm_load(self, key: str) -> Optional[aiosqlite.Row]:
+        async with self._reader() as conn, conn.execute(
+            "SELECT state, data, updated_at FROM fsm_states WHERE key=?",
+            (key,),
+        ) as cur:
+            return await cur.fetchone()
+
+    async def fsm_save(self, upserts: Sequence[Tuple[str, Optional[str], str, int]], deletes: Sequence[str]) -> None:
+        async with self._transaction() as conn:
+            if upserts:
+                await conn.executemany(
+                    (
+                        "INSERT INTO fsm_states(key, state, data, updated_at) VALUES(?, ?, ?, ?)\n"
+                        "ON CONFLICT(key) DO UPDATE SET state=excluded.state, data=excluded.data, updated_at=excluded.updated_at"
+                    ),
+                    upserts,
+                )
+            if deletes:
+                await conn.executemany("DELETE FROM fsm_states WHERE key=?", [(k,) for k in deletes])
+
+    async def fsm_purge(self, before: int) -> int:
+        async with self._transaction() as conn:
+            cur = await conn.execute("DELETE FROM fsm_states WHERE updated_at < ?", (before,))
+            return cur.rowcount
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from .db import Database
+
+
+logger = logging.getLogger(__name__)
+
+
+class DedupeStore:
+    """Remembers which updates were already handled.
+
+    Keys live in a bounded in-memory window preloaded from ``processed_updates`` and are
+    written back in batches. With ``flush_ms <= 0`` every check is an atomic claim in the table
+    instead, which is what several processes sharing one database need.
+    """
+
+    def __init__(self, db: Database, window: int = 50_000, retention: int = 86_400, flush_ms: int = 500) -> None:
+        self._db = db
+        self._window = max(1, window)
+        self._retention = retention
+        self._flush_ms = flush_ms
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._pending: List[Tuple[str, int]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+
+    async def load(self) -> None:
+        if self._flush_ms <= 0:
+            return
+        rows = await self._db.dedupe_load(int(time.time()) - self._retention, self._window)
+        # oldest first, so that the window evicts them first
+        for key, _ in reversed(rows):
+            self._seen[key] = None
+
+    async def seen(self, keys: Sequence[str]) -> bool:
+        """Return True if any of ``keys`` was seen before; otherwise mark them all as seen."""
+        now = int(time.time())
+        if self._flush_ms <= 0:
+            fresh = await self._db.dedupe_claim(keys, now)
+            await self._purge()
+            return not fresh
+        if any(key in self._seen for key in keys):
+            return True
+        for key in keys:
+            self._seen[key] = None
+            self._pending.append((key, now))
+        while len(self._seen) > self._window:
+            self._seen.popitem(last=False)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+        return False
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self._flush_ms / 1000)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Dedupe store flush failed")
+
+    async def flush(self) -> None:
+        if self._pending:
+            pending, self._pending = self._pending, []
+            try:
+                await self._db.dedupe_save(pending)
+            except Exception:
+                self._pending = pending + self._pending
+                raise
+        await self._purge()
+
+    async def _purge(self) -> None:
+        now = time.time()
+        if now - self._last_purge > 3600:
+            self._last_purge = now
+            await self._db.dedupe_purge(int(now) - self._retention)
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,149 @@
+import asyncio
+import copy
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from .db import Database
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    updated_at: float = 0.0
+
+    @property
+    def empty(self) -> bool:
+        return self.state is None and not self.data
+
+
+def _storage_key(key: StorageKey) -> str:
+    return ":".join(
+        str(part) if part is not None else ""
+        for part in (
+            key.bot_id,
+            key.chat_id,
+            key.user_id,
+            key.thread_id,
+            getattr(key, "business_connection_id", None),
+            key.destiny,
+        )
+    )
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM storage persisted in the bot database.
+
+    Reads go through an in-process LRU, writes are coalesced per key and flushed in one
+    transaction, and states untouched for ``ttl`` seconds are treated as abandoned.
+    """
+
+    def __init__(self, db: Database, cache_size: int = 10_000, ttl: float = 172_800, flush_ms: int = 500) -> None:
+        self._db = db
+        self._cache_size = max(0, cache_size)
+        self._ttl = ttl
+        self._flush_ms = flush_ms
+        self._cache: "OrderedDict[str, _Record]" = OrderedDict()
+        self._dirty: Dict[str, _Record] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+
+    def _expired(self, record: _Record, now: float) -> bool:
+        return self._ttl > 0 and record.updated_at > 0 and now - record.updated_at > self._ttl
+
+    async def _load(self, key: str) -> _Record:
+        now = time.time()
+        record = self._dirty.get(key) or self._cache.get(key)
+        if record is not None:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+        else:
+            row = await self._db.fsm_load(key)
+            if row is None:
+                record = _Record()
+            else:
+                record = _Record(row["state"], json.loads(row["data"]) if row["data"] else {}, float(row["updated_at"]))
+            self._remember(key, record)
+        if self._expired(record, now):
+            return _Record()
+        return record
+
+    def _remember(self, key: str, record: _Record) -> None:
+        if not self._cache_size:
+            return
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def _store(self, key: str, record: _Record) -> None:
+        record.updated_at = time.time()
+        self._remember(key, record)
+        self._dirty[key] = record
+        if self._flush_ms <= 0:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self._flush_ms / 1000)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("FSM storage flush failed")
+
+    async def flush(self) -> None:
+        if self._dirty:
+            dirty, self._dirty = self._dirty, {}
+            upserts = []
+            deletes = []
+            for key, record in dirty.items():
+                if record.empty:
+                    deletes.append(key)
+                else:
+                    upserts.append((key, record.state, json.dumps(record.data, ensure_ascii=False), int(record.updated_at)))
+            try:
+                await self._db.fsm_save(upserts, deletes)
+            except Exception:
+                # newer writes made during the failed flush win over the ones we retry
+                for key, record in dirty.items():
+                    self._dirty.setdefault(key, record)
+                raise
+        now = time.time()
+        if self._ttl > 0 and now - self._last_purge > 60:
+            self._last_purge = now
+            await self._db.fsm_purge(int(now - self._ttl))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        skey = _storage_key(key)
+        current = await self._load(skey)
+        new_state = state.state if isinstance(state, State) else state
+        await self._store(skey, _Record(new_state, current.data))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(_storage_key(key))).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        skey = _storage_key(key)
+        current = await self._load(skey)
+        await self._store(skey, _Record(current.state, copy.deepcopy(dict(data))))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return copy.deepcopy((await self._load(_storage_key(key))).data)
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,74 @@
+import functools
+import inspect
+import time
+from typing import Any, Callable
+
+from app.utils.metrics import REGISTRY, Registry
+
+from .db import Database
+
+
+# lifecycle methods, not queries
+_SKIP = {"connect", "init", "close"}
+
+
+def _timed(method: Callable[..., Any], name: str, registry: Registry) -> Callable[..., Any]:
+    seconds = registry.histogram("bot_db_query_duration_seconds", "Database method latency", ("method",))
+    errors = registry.counter("bot_db_query_errors_total", "Database methods that raised", ("method",))
+
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            errors.inc(name)
+            raise
+        finally:
+            seconds.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+def instrument(db: Database, registry: Registry = REGISTRY) -> Database:
+    """Time every public coroutine method of ``db`` and export its queue depths and reader pool stats.
+
+    The wrappers are set on the instance, so an uninstrumented ``Database`` pays nothing.
+    """
+    for name, _ in inspect.getmembers(type(db), inspect.iscoroutinefunction):
+        if name.startswith("_") or name in _SKIP:
+            continue
+        setattr(db, name, _timed(getattr(db, name), name, registry))
+    registry.callback_gauge(
+        "bot_db_queue_depth",
+        "Requests waiting for an aiosqlite connection thread",
+        ("connection",),
+        lambda: {(name,): depth for name, depth in db.queue_depths().items()},
+    )
+    pool = db.pool_stats
+    registry.callback_gauge(
+        "bot_db_reader_waiting",
+        "Reads waiting for a free pooled connection",
+        (),
+        lambda: {(): pool.waiting},
+    )
+    registry.callback_gauge("bot_db_readers", "Pooled read-only connections", (), lambda: {(): pool.readers})
+    registry.callback_counter(
+        "bot_db_reader_acquisitions_total",
+        "Reads that took a pooled connection",
+        (),
+        lambda: {(): pool.acquisitions},
+    )
+    registry.callback_counter(
+        "bot_db_reader_wait_seconds_total",
+        "Time reads spent waiting for a pooled connection",
+        (),
+        lambda: {(): pool.total_wait},
+    )
+    registry.callback_gauge(
+        "bot_db_reader_max_wait_seconds",
+        "Longest wait for a pooled connection since start",
+        (),
+        lambda: {(): pool.max_wait},
+    )
+    return db
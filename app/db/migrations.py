@@ -0,0 +1,273 @@
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Union
+
+import aiosqlite
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    first_name TEXT,
+    username TEXT,
+    points INTEGER NOT NULL DEFAULT 0,
+    daily_time TEXT,
+    daily_enabled INTEGER NOT NULL DEFAULT 1,
+    timezone TEXT,
+    last_daily_sent DATE
+);
+
+CREATE TABLE IF NOT EXISTS categories (
+    code TEXT PRIMARY KEY,
+    title TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS practices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_code TEXT NOT NULL REFERENCES categories(code) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    description TEXT,
+    steps_json TEXT,
+    timer_seconds INTEGER,
+    is_active INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS journal_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    note TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_practice_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    practice_id INTEGER NOT NULL REFERENCES practices(id) ON DELETE CASCADE,
+    performed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS checklists (
+    code TEXT PRIMARY KEY,
+    title TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS checklist_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    checklist_code TEXT NOT NULL REFERENCES checklists(code) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    order_index INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS user_checklist_progress (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    checklist_item_id INTEGER NOT NULL REFERENCES checklist_items(id) ON DELETE CASCADE,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, checklist_item_id)
+);
+
+CREATE TABLE IF NOT EXISTS achievements (
+    code TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS user_achievements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    achievement_code TEXT NOT NULL REFERENCES achievements(code) ON DELETE CASCADE,
+    earned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, achievement_code)
+);
+"""
+
+
+async def _add_daily_schedule_columns(conn: aiosqlite.Connection) -> None:
+    # databases touched by the first per-user scheduler build may already have them
+    async with conn.execute("PRAGMA table_info(users)") as cur:
+        existing = {row[1] for row in await cur.fetchall()}
+    for name, decl in (("daily_next_at", "TEXT"), ("daily_next_day", "DATE")):
+        if name not in existing:
+            await conn.execute(f"ALTER TABLE users ADD COLUMN {name} {decl}")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_users_daily_next ON users(daily_next_at)")
+
+
+SECONDARY_INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_journal_user_created ON journal_entries(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_practice_log_user_performed ON user_practice_log(user_id, performed_at);
+CREATE INDEX IF NOT EXISTS idx_practices_category_active ON practices(category_code, is_active);
+CREATE INDEX IF NOT EXISTS idx_practices_title ON practices(title);
+"""
+
+USER_STREAKS_SQL = """
+CREATE TABLE IF NOT EXISTS user_streaks (
+    user_id INTEGER PRIMARY KEY,
+    current_streak INTEGER NOT NULL DEFAULT 0,
+    longest_streak INTEGER NOT NULL DEFAULT 0,
+    last_active_day DATE
+);
+"""
+
+# Database.init() backfills user_streaks from the log when this migration is applied
+USER_STREAKS_VERSION = 4
+
+USER_COUNTERS_SQL = """
+ALTER TABLE users ADD COLUMN practices_done INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE users ADD COLUMN journal_count INTEGER NOT NULL DEFAULT 0;
+UPDATE users SET
+    practices_done = (SELECT COUNT(*) FROM user_practice_log l WHERE l.user_id = users.user_id),
+    journal_count = (SELECT COUNT(*) FROM journal_entries j WHERE j.user_id = users.user_id);
+"""
+
+FSM_STATES_SQL = """
+CREATE TABLE IF NOT EXISTS fsm_states (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fsm_states_updated ON fsm_states(updated_at);
+"""
+
+LEASES_SQL = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+REMINDERS_SQL = """
+CREATE TABLE IF NOT EXISTS reminders (
+    user_id INTEGER NOT NULL,
+    practice_id INTEGER NOT NULL,
+    due_at INTEGER NOT NULL,
+    PRIMARY KEY (user_id, practice_id)
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders(due_at);
+"""
+
+PROCESSED_UPDATES_SQL = """
+CREATE TABLE IF NOT EXISTS processed_updates (
+    key TEXT PRIMARY KEY,
+    seen_at INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_processed_updates_seen ON processed_updates(seen_at);
+"""
+
+# each checklist item gets a stable bit, and a user's progress on a checklist is one integer
+# (so a checklist holds at most 63 items)
+CHECKLIST_BITS_SQL = """
+ALTER TABLE checklist_items ADD COLUMN bit INTEGER;
+UPDATE checklist_items SET bit = (
+    SELECT COUNT(*) FROM checklist_items prev
+    WHERE prev.checklist_code = checklist_items.checklist_code AND prev.id < checklist_items.id
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_checklist_items_bit ON checklist_items(checklist_code, bit);
+CREATE TABLE IF NOT EXISTS user_checklists (
+    user_id INTEGER NOT NULL,
+    checklist_code TEXT NOT NULL,
+    bits INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, checklist_code)
+) WITHOUT ROWID;
+INSERT OR REPLACE INTO user_checklists(user_id, checklist_code, bits)
+SELECT ucp.user_id, ci.checklist_code, SUM(1 << ci.bit)
+FROM user_checklist_progress ucp
+JOIN checklist_items ci ON ci.id = ucp.checklist_item_id
+WHERE ucp.done = 1
+GROUP BY ucp.user_id, ci.checklist_code;
+"""
+
+CONTENT_META_SQL = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_practices_category_title ON practices(category_code, title);
+CREATE INDEX IF NOT EXISTS idx_checklist_items_code_title ON checklist_items(checklist_code, title);
+"""
+
+# the daily push pages through due users in this order; the old index is its prefix
+DAILY_DUE_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_users_daily_due ON users(daily_next_at, user_id);
+DROP INDEX IF EXISTS idx_users_daily_next;
+"""
+
+# imports match practices by (category_code, title); older imports could insert a key twice.
+# Extra copies keep their ids (logs and reminders point at them) but are renamed and hidden.
+UNIQUE_PRACTICE_KEY_SQL = """
+UPDATE practices SET title = title || ' #' || id, is_active = 0
+WHERE id NOT IN (SELECT MIN(id) FROM practices GROUP BY category_code, title);
+DROP INDEX IF EXISTS idx_practices_category_title;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_practices_category_title ON practices(category_code, title);
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    # either a SQL script or a coroutine that receives the connection inside the transaction
+    apply: Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+# Append only: a database at user_version N has applied every migration up to N.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "base schema", SCHEMA_SQL),
+    Migration(2, "per-user daily schedule", _add_daily_schedule_columns),
+    Migration(3, "secondary indexes", SECONDARY_INDEXES_SQL),
+    Migration(USER_STREAKS_VERSION, "incremental streak state", USER_STREAKS_SQL),
+    Migration(5, "per-user aggregate counters", USER_COUNTERS_SQL),
+    Migration(6, "persistent FSM storage", FSM_STATES_SQL),
+    Migration(7, "practice reminders", REMINDERS_SQL),
+    Migration(8, "leader leases", LEASES_SQL),
+    Migration(9, "processed update keys", PROCESSED_UPDATES_SQL),
+    Migration(10, "checklist progress bitsets", CHECKLIST_BITS_SQL),
+    Migration(11, "content meta and lookup indexes", CONTENT_META_SQL),
+    Migration(12, "daily push keyset index", DAILY_DUE_INDEX_SQL),
+    Migration(13, "unique practice keys", UNIQUE_PRACTICE_KEY_SQL),
+]
+
+
+async def _user_version(conn: aiosqlite.Connection) -> int:
+    async with conn.execute("PRAGMA user_version") as cur:
+        row = await cur.fetchone()
+    return int(row[0]) if row else 0
+
+
+async def migrate(conn: aiosqlite.Connection) -> List[int]:
+    """Apply pending migrations, each in its own transaction. Returns the applied versions."""
+    version = await _user_version(conn)
+    applied: List[int] = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        logger.info("Applying migration %s: %s", migration.version, migration.name)
+        # PRAGMA does not accept bound parameters; the version is our own int
+        set_version = f"PRAGMA user_version = {int(migration.version)};"
+        try:
+            if isinstance(migration.apply, str):
+                await conn.executescript(f"BEGIN;\n{migration.apply}\n{set_version}\nCOMMIT;")
+            else:
+                await conn.commit()
+                await conn.execute("BEGIN")
+                await migration.apply(conn)
+                await conn.execute(set_version)
+                await conn.commit()
+        except Exception:
+            await conn.rollback()
+            # several workers may start against a fresh file; the loser finds the work already done
+            if await _user_version(conn) < migration.version:
+                raise
+            logger.info("Migration %s was applied by another process", migration.version)
+            version = migration.version
+            continue
+        version = migration.version
+        applied.append(version)
+    return applied
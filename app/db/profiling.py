@@ -0,0 +1,133 @@
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiosqlite
+from aiosqlite.context import contextmanager
+from aiosqlite.cursor import Cursor
+
+
+logger = logging.getLogger(__name__)
+
+# distinct statements kept; the smallest by total time is dropped past this
+MAX_STATEMENTS = 500
+
+
+@dataclass
+class QueryStat:
+    sql: str
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    slow: int = 0
+    # from the last captured plan of a slow run
+    full_scan: bool = False
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    # runs in the connection thread, so queueing behind other statements is not counted
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _explain(conn: sqlite3.Connection, sql: str, parameters: Any) -> List[str]:
+    return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()]
+
+
+def _is_full_scan(detail: str) -> bool:
+    # "SCAN t" reads the whole table; "SCAN t USING [COVERING] INDEX i" walks an index instead,
+    # and scans of subquery results or of a constant row touch no table at all
+    if not detail.startswith("SCAN ") or "USING" in detail:
+        return False
+    return "subquery" not in detail and "CONSTANT ROW" not in detail
+
+
+def _short(value: Any, limit: int = 300) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class QueryProfiler:
+    """Per-statement timings for ``ProfiledConnection``.
+
+    Statements are keyed by their whitespace-normalized SQL. Runs slower than ``slow_ms`` are
+    logged with their parameters and ``EXPLAIN QUERY PLAN`` output. Timings cover execution up to
+    the first result row, which is where SQLite does the searching for the queries in this bot.
+    """
+
+    def __init__(self, slow_ms: float = 50.0) -> None:
+        self.slow_ms = slow_ms
+        self._stats: Dict[str, QueryStat] = {}
+
+    def top(self, n: int = 20) -> List[QueryStat]:
+        return sorted(self._stats.values(), key=lambda s: s.total, reverse=True)[:n]
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    async def record(self, conn: "ProfiledConnection", sql: str, parameters: Any, elapsed: float, rows: int = 1) -> None:
+        key = " ".join(sql.split())
+        stat = self._stats.get(key)
+        if stat is None:
+            if len(self._stats) >= MAX_STATEMENTS:
+                del self._stats[min(self._stats.values(), key=lambda s: s.total).sql]
+            stat = self._stats[key] = QueryStat(key)
+        stat.calls += 1
+        stat.total += elapsed
+        stat.max = max(stat.max, elapsed)
+        if elapsed * 1000 < self.slow_ms:
+            return
+        stat.slow += 1
+        try:
+            plan = await conn.explain(sql, parameters)
+        except sqlite3.Error:
+            # PRAGMAs, DDL and the like have no plan
+            plan = []
+        stat.full_scan = any(_is_full_scan(line) for line in plan)
+        logger.warning(
+            "Slow query %.1fms%s%s: %s params=%s\n  plan: %s",
+            elapsed * 1000,
+            f" x{rows} rows" if rows != 1 else "",
+            " (full scan)" if stat.full_scan else "",
+            _short(key),
+            _short(parameters),
+            "; ".join(plan) or "-",
+        )
+
+
+class ProfiledConnection(aiosqlite.Connection):
+    """aiosqlite connection that reports ``execute`` and ``executemany`` timings to a profiler."""
+
+    def __init__(self, connector: Callable[[], sqlite3.Connection], profiler: QueryProfiler) -> None:
+        super().__init__(connector, 64)
+        self._profiler = profiler
+
+    @contextmanager
+    async def execute(self, sql: str, parameters: Optional[Iterable[Any]] = None) -> Cursor:
+        parameters = [] if parameters is None else parameters
+        cursor, elapsed = await self._execute(_timed, self._conn.execute, sql, parameters)
+        await self._profiler.record(self, sql, parameters, elapsed)
+        return Cursor(self, cursor)
+
+    @contextmanager
+    async def executemany(self, sql: str, parameters: Iterable[Iterable[Any]]) -> Cursor:
+        rows: Sequence[Any] = list(parameters)
+        cursor, elapsed = await self._execute(_timed, self._conn.executemany, sql, rows)
+        await self._profiler.record(self, sql, rows[0] if rows else [], elapsed, rows=len(rows))
+        return Cursor(self, cursor)
+
+    async def explain(self, sql: str, parameters: Any) -> List[str]:
+        return await self._execute(_explain, self._conn, sql, parameters)
+
+
+def open_connection(database: str, profiler: Optional[QueryProfiler] = None, **kwargs: Any) -> aiosqlite.Connection:
+    if profiler is None:
+        return aiosqlite.connect(database, **kwargs)
+    return ProfiledConnection(lambda: sqlite3.connect(database, **kwargs), profiler)
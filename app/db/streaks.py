@@ -0,0 +1,56 @@
+import datetime as dt
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Tuple
+
+import aiosqlite
+
+from app.utils.timezones import resolve_zone
+
+
+@dataclass(frozen=True)
+class StreakState:
+    current: int = 0
+    longest: int = 0
+    last_active_day: Optional[dt.date] = None
+
+    def advance(self, day: dt.date) -> "StreakState":
+        last = self.last_active_day
+        if last is not None and day <= last:
+            # same day again, or a late write for a day that is already counted
+            return self
+        current = self.current + 1 if last is not None and day - last == dt.timedelta(days=1) else 1
+        return StreakState(current, max(self.longest, current), day)
+
+    def current_on(self, today: dt.date) -> int:
+        # the streak is shown only while it includes today
+        return self.current if self.last_active_day == today else 0
+
+
+def parse_utc(value: str) -> dt.datetime:
+    # SQLite CURRENT_TIMESTAMP format, always UTC
+    return dt.datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=dt.timezone.utc)
+
+
+def local_day(moment: dt.datetime, timezone: Optional[str], default_tz: str) -> dt.date:
+    return moment.astimezone(resolve_zone(timezone, default_tz)).date()
+
+
+async def replay_streaks(conn: aiosqlite.Connection, default_tz: str) -> AsyncIterator[Tuple[int, StreakState]]:
+    """Rebuild every user's streak state from user_practice_log, one user at a time."""
+    user_id: Optional[int] = None
+    state = StreakState()
+    async with conn.execute(
+        (
+            "SELECT l.user_id, l.performed_at, u.timezone FROM user_practice_log l\n"
+            "LEFT JOIN users u ON u.user_id = l.user_id ORDER BY l.user_id, l.performed_at"
+        )
+    ) as cur:
+        async for row in cur:
+            uid = int(row[0])
+            if uid != user_id:
+                if user_id is not None:
+                    yield user_id, state
+                user_id, state = uid, StreakState()
+            state = state.advance(local_day(parse_utc(row[1]), row[2], default_tz))
+    if user_id is not None:
+        yield user_id, state
@@ -1,73 +1,157 @@
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
-
-
-def main_menu_kb() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [
-                KeyboardButton(text="📚 Библиотека"),
-                KeyboardButton(text="🌿 Я здесь"),
-            ],
-            [
-                KeyboardButton(text="🌅 Практика дня"),
-                KeyboardButton(text="✅ Чек-листы"),
-            ],
-        ],
-        resize_keyboard=True,
-        input_field_placeholder="Выберите раздел",
-    )
-
-
-def categories_kb(categories: list[tuple[str, str]]) -> InlineKeyboardMarkup:
-    rows = []
-    for code, title in categories:
-        rows.append([InlineKeyboardButton(text=title, callback_data=f"cat:{code}")])
-    return InlineKeyboardMarkup(inline_keyboard=rows)
-
-
-def practices_kb(practices: list[tuple[int, str]]) -> InlineKeyboardMarkup:
-    rows = []
-    for pid, title in practices:
-        rows.append([InlineKeyboardButton(text=title, callback_data=f"pr:{pid}")])
-    return InlineKeyboardMarkup(inline_keyboard=rows)
-
-
-def checklist_items_kb(items: list[tuple[int, str, int]]) -> InlineKeyboardMarkup:
-    rows = []
-    for item_id, title, done in items:
-        prefix = "✅" if done else "☑️"
-        rows.append([InlineKeyboardButton(text=f"{prefix} {title}", callback_data=f"cli:{item_id}")])
-    return InlineKeyboardMarkup(inline_keyboard=rows)
-
-
-def practice_actions_kb(practice_id: int) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="✅ Выполнено", callback_data=f"done:{practice_id}")],
-            [
-                InlineKeyboardButton(text="⏰ Напомнить 15 мин", callback_data=f"remind:{practice_id}:900"),
-                InlineKeyboardButton(text="⏰ 1 час", callback_data=f"remind:{practice_id}:3600"),
-                InlineKeyboardButton(text="⏰ 3 часа", callback_data=f"remind:{practice_id}:10800"),
-            ],
-        ]
-    )
-
-
-def state_select_kb() -> InlineKeyboardMarkup:
-    # Base states with emojis
-    buttons = [
-        ("😡 Я зол", "angry"),
-        ("😕 Я растерян", "confused"),
-        ("🤔 Мне странно", "strange"),
-        ("😰 Мне тревожно", "anxious"),
-        ("😔 Мне грустно", "sad"),
-        ("😴 Я устал", "tired"),
-        ("🙂 Я спокоен", "calm"),
-        ("😊 Мне хорошо", "good"),
-    ]
-    rows = []
-    for text, code in buttons:
-        rows.append([InlineKeyboardButton(text=text, callback_data=f"st:{code}")])
-    return InlineKeyboardMarkup(inline_keyboard=rows)
-
-
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Tuple
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+
+if TYPE_CHECKING:
+    # app.db imports the formatting helpers, which import this module
+    from app.db.catalog import Page
+
+# Keyboards are immutable once built, so static ones are created once and dynamic ones are
+# memoized by their content; handlers must never modify a returned markup.
+
+
+def _build_main_menu_kb() -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        keyboard=[
+            [
+                KeyboardButton(text="📚 Библиотека"),
+                KeyboardButton(text="🌿 Я здесь"),
+            ],
+            [
+                KeyboardButton(text="🌅 Практика дня"),
+                KeyboardButton(text="✅ Чек-листы"),
+            ],
+        ],
+        resize_keyboard=True,
+        input_field_placeholder="Выберите раздел",
+    )
+
+
+_MAIN_MENU_KB = _build_main_menu_kb()
+
+
+def main_menu_kb() -> ReplyKeyboardMarkup:
+    return _MAIN_MENU_KB
+
+
+# Paged lists carry their cursor in the callback data: "<prefix><" + first row asks for the
+# previous page, "<prefix>>" + last row for the next one.
+Nav = Tuple[Optional[str], Optional[str]]
+
+
+def page_nav(prefix: str, page: "Page", cursor: Callable[[Any], Any]) -> Nav:
+    prev_data = f"{prefix}<{cursor(page.items[0])}" if page.has_prev and page.items else None
+    next_data = f"{prefix}>{cursor(page.items[-1])}" if page.has_next and page.items else None
+    return prev_data, next_data
+
+
+def parse_cursor(value: str) -> Tuple[Optional[str], Optional[str]]:
+    """Split "<cursor" / ">cursor" from paged callback data into (after, before)."""
+    if value[:1] == ">":
+        return value[1:], None
+    if value[:1] == "<":
+        return None, value[1:]
+    return None, None
+
+
+def _with_nav(rows: List[List[InlineKeyboardButton]], nav: Nav) -> InlineKeyboardMarkup:
+    prev_data, next_data = nav
+    buttons = []
+    if prev_data:
+        buttons.append(InlineKeyboardButton(text="◀️", callback_data=prev_data))
+    if next_data:
+        buttons.append(InlineKeyboardButton(text="▶️", callback_data=next_data))
+    if buttons:
+        rows.append(buttons)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def categories_kb(categories: Sequence[Tuple[str, str]], nav: Nav = (None, None)) -> InlineKeyboardMarkup:
+    return _categories_kb(tuple(categories), nav)
+
+
+@lru_cache(maxsize=32)
+def _categories_kb(categories: Tuple[Tuple[str, str], ...], nav: Nav) -> InlineKeyboardMarkup:
+    rows = []
+    for code, title in categories:
+        rows.append([InlineKeyboardButton(text=title, callback_data=f"cat:{code}")])
+    return _with_nav(rows, nav)
+
+
+def practices_kb(practices: Sequence[Tuple[int, str]], nav: Nav = (None, None)) -> InlineKeyboardMarkup:
+    return _practices_kb(tuple(practices), nav)
+
+
+@lru_cache(maxsize=128)
+def _practices_kb(practices: Tuple[Tuple[int, str], ...], nav: Nav) -> InlineKeyboardMarkup:
+    rows = []
+    for pid, title in practices:
+        rows.append([InlineKeyboardButton(text=title, callback_data=f"pr:{pid}")])
+    return _with_nav(rows, nav)
+
+
+def checklists_kb(checklists: Sequence[Tuple[str, str]], nav: Nav = (None, None)) -> InlineKeyboardMarkup:
+    return _checklists_kb(tuple(checklists), nav)
+
+
+@lru_cache(maxsize=32)
+def _checklists_kb(checklists: Tuple[Tuple[str, str], ...], nav: Nav) -> InlineKeyboardMarkup:
+    rows = []
+    for code, title in checklists:
+        rows.append([InlineKeyboardButton(text=title, callback_data=f"cl:{code}")])
+    return _with_nav(rows, nav)
+
+
+def checklist_items_kb(items: Sequence[Tuple[int, str, int]], back: bool = False) -> InlineKeyboardMarkup:
+    return _checklist_items_kb(tuple(items), back)
+
+
+@lru_cache(maxsize=256)
+def _checklist_items_kb(items: Tuple[Tuple[int, str, int], ...], back: bool) -> InlineKeyboardMarkup:
+    rows = []
+    for item_id, title, done in items:
+        prefix = "✅" if done else "☑️"
+        rows.append([InlineKeyboardButton(text=f"{prefix} {title}", callback_data=f"cli:{item_id}")])
+    if back:
+        rows.append([InlineKeyboardButton(text="⬅️ Все чек-листы", callback_data="clp:")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+@lru_cache(maxsize=1024)
+def practice_actions_kb(practice_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="✅ Выполнено", callback_data=f"done:{practice_id}")],
+            [
+                InlineKeyboardButton(text="⏰ Напомнить 15 мин", callback_data=f"remind:{practice_id}:900"),
+                InlineKeyboardButton(text="⏰ 1 час", callback_data=f"remind:{practice_id}:3600"),
+                InlineKeyboardButton(text="⏰ 3 часа", callback_data=f"remind:{practice_id}:10800"),
+            ],
+        ]
+    )
+
+
+def _build_state_select_kb() -> InlineKeyboardMarkup:
+    # Base states with emojis
+    buttons = [
+        ("😡 Я зол", "angry"),
+        ("😕 Я растерян", "confused"),
+        ("🤔 Мне странно", "strange"),
+        ("😰 Мне тревожно", "anxious"),
+        ("😔 Мне грустно", "sad"),
+        ("😴 Я устал", "tired"),
+        ("🙂 Я спокоен", "calm"),
+        ("😊 Мне хорошо", "good"),
+    ]
+    rows = []
+    for text, code in buttons:
+        rows.append([InlineKeyboardButton(text=text, callback_data=f"st:{code}")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+_STATE_SELECT_KB = _build_state_select_kb()
+
+
+def state_select_kb() -> InlineKeyboardMarkup:
+    return _STATE_SELECT_KB
@@ -1,97 +1,339 @@
-import asyncio
-import logging
-import os
-from contextlib import suppress
-
-from aiogram import Bot, Dispatcher
-from aiogram.enums import ParseMode
-from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.types import BotCommand
-from dotenv import load_dotenv
-
-from app.config import load_settings
-from app.db.db import Database
-from app.routers.start import router as start_router
-from app.routers.library import router as library_router
-from app.routers.journal import router as journal_router
-from app.routers.checklists import router as checklists_router
-from app.routers.actions import router as actions_router
-from app.routers.stats import router as stats_router
-from app.routers.minigame import router as minigame_router
-from app.routers.state_strange import router as state_strange_router
-from app.services.scheduler import SchedulerService
-from app.bootstrap import attach_context
-
-
-async def set_commands(bot: Bot) -> None:
-    commands = [
-        BotCommand(command="start", description="Приветствие и выбор состояния"),
-        BotCommand(command="library", description="📚 Библиотека практик"),
-        BotCommand(command="journal", description="🌿 Я здесь"),
-        BotCommand(command="checklists", description="✅ Чек-листы"),
-    ]
-    await bot.set_my_commands(commands)
-
-
-async def on_startup(bot: Bot, db: Database, scheduler: SchedulerService) -> None:
-    await set_commands(bot)
-    await db.init()
-    await scheduler.start()
-
-
-async def on_shutdown(scheduler: SchedulerService, db: Database) -> None:
-    await scheduler.stop()
-    await db.close()
-
-
-async def main() -> None:
-    load_dotenv()  # load .env if present
-    settings = load_settings()
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    )
-
-    if not settings.bot_token:
-        raise RuntimeError("TELEGRAM_BOT_TOKEN is not set")
-
-    bot = Bot(token=settings.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
-
-    db = Database(db_path=settings.db_path)
-    scheduler = SchedulerService(bot=bot, db=db, settings=settings)
-    attach_context(bot, db, scheduler)
-
-    dp.include_router(start_router)
-    dp.include_router(library_router)
-    dp.include_router(journal_router)
-    dp.include_router(checklists_router)
-    dp.include_router(actions_router)
-    dp.include_router(stats_router)
-    dp.include_router(minigame_router)
-    dp.include_router(state_strange_router)
-
-    # Startup and shutdown hooks
-    async def _startup() -> None:
-        await on_startup(bot, db, scheduler)
-
-    async def _shutdown() -> None:
-        await on_shutdown(scheduler, db)
-
-    dp.startup.register(_startup)
-    dp.shutdown.register(_shutdown)
-
-    try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
-    finally:
-        with suppress(Exception):
-            await bot.session.close()
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
-
-
+import time
+
+# measured before the heavy imports below, for the startup timing log
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+from contextlib import suppress
+from typing import Any, Awaitable, Dict, Optional
+
+from aiogram import Bot, Dispatcher, F
+from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.client.default import DefaultBotProperties
+from aiogram.types import BotCommand
+from dotenv import load_dotenv
+
+from app.config import Settings, load_settings
+from app.db.db import Database
+from app.db.dedupe import DedupeStore
+from app.db.fsm import SQLiteStorage
+from app.db.metrics import instrument
+from app.db.profiling import QueryProfiler
+from app.middlewares import (
+    ApiMetricsMiddleware,
+    HandlerMetricsMiddleware,
+    IdempotencyMiddleware,
+    ThrottlingMiddleware,
+    UpdateMetricsMiddleware,
+)
+from app.routers.start import router as start_router
+from app.routers.library import router as library_router
+from app.routers.journal import router as journal_router
+from app.routers.checklists import router as checklists_router
+from app.routers.actions import router as actions_router
+from app.routers.stats import router as stats_router
+from app.routers.minigame import router as minigame_router
+from app.routers.lazy import lazy_router
+from app.routers.admin import router as admin_router
+from app.services.content import ContentWatcher
+from app.services.leader import LeaderLease
+from app.services.metrics import MetricsServer
+from app.services.reminders import ReminderService
+from app.services.scheduler import SchedulerService
+from app.bootstrap import attach_context
+
+_IMPORTED = time.perf_counter()
+
+# Telegram being slow or unreachable must not hold up the start of update processing
+SET_COMMANDS_TIMEOUT = 10.0
+
+
+async def set_commands(bot: Bot) -> None:
+    commands = [
+        BotCommand(command="start", description="Приветствие и выбор состояния"),
+        BotCommand(command="library", description="📚 Библиотека практик"),
+        BotCommand(command="journal", description="🌿 Я здесь"),
+        BotCommand(command="checklists", description="✅ Чек-листы"),
+    ]
+    await bot.set_my_commands(commands)
+
+
+async def _set_commands_safe(bot: Bot) -> None:
+    try:
+        await asyncio.wait_for(set_commands(bot), SET_COMMANDS_TIMEOUT)
+    except Exception:
+        # the command menu is cosmetic; the previous one stays in place until the next start
+        logging.warning("Failed to set bot commands", exc_info=True)
+
+
+async def _timed(phases: Dict[str, float], name: str, step: Awaitable[Any]) -> Any:
+    started = time.perf_counter()
+    try:
+        return await step
+    finally:
+        phases[name] = time.perf_counter() - started
+
+
+async def on_startup(
+    bot: Bot,
+    db: Database,
+    dedupe: DedupeStore,
+    leader: LeaderLease,
+    worker_index: int = 0,
+    metrics: Optional[MetricsServer] = None,
+) -> None:
+    phases: Dict[str, float] = {"imports": _IMPORTED - _IMPORT_STARTED}
+    started = time.perf_counter()
+    # the command menu is a Telegram round trip that nothing else waits on
+    steps = [_timed(phases, "db", db.init())]
+    if worker_index == 0:
+        steps.append(_timed(phases, "commands", _set_commands_safe(bot)))
+    if metrics is not None:
+        steps.append(_timed(phases, "metrics", metrics.start()))
+    await asyncio.gather(*steps)
+    # both need the schema; the daily broadcast and reminders run only in the process holding the lease
+    await asyncio.gather(
+        _timed(phases, "dedupe", dedupe.load()),
+        _timed(phases, "leader", leader.start()),
+    )
+    phases["startup"] = time.perf_counter() - started
+    phases["ready"] = time.perf_counter() - _IMPORT_STARTED
+    logging.info("Startup: %s", " ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in phases.items()))
+
+
+async def on_shutdown(
+    leader: LeaderLease,
+    db: Database,
+    storage: SQLiteStorage,
+    dedupe: DedupeStore,
+    metrics: Optional[MetricsServer] = None,
+) -> None:
+    # stops the scheduled jobs and lets another process take them over without waiting for expiry
+    await leader.stop()
+    if metrics is not None:
+        await metrics.stop()
+    await storage.close()
+    await dedupe.close()
+    # persist buffered points and daily push results before the connection goes away
+    await db.flush()
+    await db.close()
+
+
+def build_dispatcher(
+    settings: Settings,
+    storage: BaseStorage,
+    dedupe: DedupeStore,
+    with_metrics: bool = False,
+) -> Dispatcher:
+    """Dispatcher with the middlewares and every router of the bot.
+
+    The routers are module-level objects and can be attached to one dispatcher only, so this
+    is called once per process.
+    """
+    dp = Dispatcher(storage=storage)
+    throttling = ThrottlingMiddleware(
+        rate=settings.throttle_rate,
+        burst=settings.throttle_burst,
+        window=settings.throttle_window,
+    )
+    if with_metrics:
+        # outermost, so the timings include deduplication and throttling
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+        handler_metrics = HandlerMetricsMiddleware()
+        dp.message.middleware(handler_metrics)
+        dp.callback_query.middleware(handler_metrics)
+    dp.update.outer_middleware(IdempotencyMiddleware(dedupe))
+    dp.message.outer_middleware(throttling)
+    dp.callback_query.outer_middleware(throttling)
+
+    admin_router.message.filter(F.from_user.id.in_(set(settings.admin_ids)))
+    dp.include_router(admin_router)
+    dp.include_router(start_router)
+    dp.include_router(library_router)
+    dp.include_router(journal_router)
+    dp.include_router(checklists_router)
+    dp.include_router(actions_router)
+    dp.include_router(stats_router)
+    dp.include_router(minigame_router)
+    # rarely used: imported on the first tap instead of at startup
+    dp.include_router(lazy_router("app.routers.state_strange", "strg:"))
+    return dp
+
+
+def _setup_process() -> None:
+    """Environment, timezone and logging, identical in the parent and in every spawned worker."""
+    load_dotenv()  # load .env if present
+    # the C library read TZ at interpreter start, before .env could set it; spawned workers
+    # start with it already set, so without this their log times differ from the parent's
+    if hasattr(time, "tzset"):
+        time.tzset()
+    _setup_logging()
+
+
+def _setup_logging() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(process)d | %(name)s | %(message)s",
+    )
+
+
+async def main(worker_index: int = 0) -> None:
+    # the entrypoints (run() and _worker()) have already called _setup_process()
+    settings = load_settings()
+
+    _check_settings(settings)
+
+    bot = Bot(token=settings.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    db = _open_database(settings)
+    metrics: Optional[MetricsServer] = None
+    if settings.metrics_enabled:
+        instrument(db)
+        bot.session.middleware(ApiMetricsMiddleware())
+        metrics = MetricsServer(settings.metrics_host, settings.metrics_port + worker_index)
+    # consecutive updates of one user may land in different workers, so FSM state is only
+    # cached and coalesced when this process is the only one handling updates
+    shared = settings.workers > 1
+    storage = SQLiteStorage(
+        db,
+        cache_size=0 if shared else settings.fsm_cache_size,
+        ttl=settings.fsm_ttl_seconds,
+        flush_ms=0 if shared else settings.write_behind_ms,
+    )
+    dedupe = DedupeStore(
+        db,
+        window=settings.dedupe_window,
+        retention=settings.dedupe_retention_seconds,
+        flush_ms=0 if shared else settings.write_behind_ms,
+    )
+    dp = build_dispatcher(settings, storage, dedupe, with_metrics=metrics is not None)
+    scheduler = SchedulerService(bot=bot, db=db, settings=settings)
+    reminders = ReminderService(bot=bot, db=db, settings=settings)
+    attach_context(bot, db, scheduler, reminders)
+
+    async def _start_jobs() -> None:
+        await scheduler.start()
+        await reminders.start()
+
+    async def _stop_jobs() -> None:
+        await scheduler.stop()
+        await reminders.stop()
+
+    leader = LeaderLease(db, "scheduler", on_acquired=_start_jobs, on_lost=_stop_jobs, ttl=settings.leader_lease_ttl)
+    # every process serves the catalog from memory, so each one watches for imports itself
+    content = ContentWatcher(db, interval=settings.content_poll_seconds)
+
+    # Startup and shutdown hooks
+    async def _startup() -> None:
+        await on_startup(bot, db, dedupe, leader, worker_index, metrics)
+        await content.start()
+
+    async def _shutdown() -> None:
+        await content.stop()
+        await on_shutdown(leader, db, storage, dedupe, metrics)
+
+    dp.startup.register(_startup)
+    dp.shutdown.register(_shutdown)
+
+    try:
+        if settings.bot_mode == "webhook":
+            from app.webhook import run_webhook
+
+            await run_webhook(bot, dp, settings, register=worker_index == 0)
+        else:
+            # a webhook left over from a webhook deployment makes getUpdates fail
+            await bot.delete_webhook()
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+    finally:
+        with suppress(Exception):
+            await bot.session.close()
+
+
+def _check_settings(settings: Settings) -> None:
+    if not settings.bot_token:
+        raise RuntimeError("TELEGRAM_BOT_TOKEN is not set")
+    if settings.bot_mode == "webhook" and not settings.webhook_secret:
+        # without it anyone who reaches the port can post updates on behalf of any user
+        raise RuntimeError("WEBHOOK_SECRET is required with BOT_MODE=webhook")
+    if settings.broadcast_rate <= 0:
+        # the daily push and reminders would fail on their first message
+        raise RuntimeError(f"BROADCAST_RATE must be positive, got {settings.broadcast_rate}")
+    if settings.throttle_rate > 0 and settings.throttle_burst < 1:
+        # a bucket that never holds a whole token drops every update
+        raise RuntimeError(f"THROTTLE_BURST must be at least 1, got {settings.throttle_burst} (THROTTLE_RATE=0 disables throttling)")
+
+
+def _open_database(settings: Settings) -> Database:
+    # a user's next update may go to another worker, which must see this one's writes at once:
+    # no write-behind buffer and no cached summaries when several processes share the file
+    shared = settings.workers > 1
+    return Database(
+        db_path=settings.db_path,
+        flush_rows=settings.write_behind_rows,
+        flush_ms=0 if shared else settings.write_behind_ms,
+        read_pool_size=settings.db_read_pool_size,
+        default_tz=settings.tz,
+        summary_ttl=0.0 if shared else settings.stats_cache_ttl,
+        profiler=QueryProfiler(settings.db_slow_query_ms) if settings.db_profile else None,
+    )
+
+
+async def _prepare_database(settings: Settings) -> None:
+    db = _open_database(settings)
+    try:
+        await db.init()
+    finally:
+        await db.close()
+
+
+def _worker(worker_index: int) -> None:
+    # a spawned process starts from scratch: no .env, no tzset(), no log handlers
+    _setup_process()
+    asyncio.run(main(worker_index))
+
+
+def _run_workers(settings: Settings) -> None:
+    # migrate and seed once, so that the workers do not all race on a fresh database file
+    asyncio.run(_prepare_database(settings))
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_worker, args=(i,), name=f"worker-{i}") for i in range(settings.workers)]
+    for proc in procs:
+        proc.start()
+    logging.info("Started %s workers: %s", len(procs), ", ".join(str(p.pid) for p in procs))
+
+    def _forward(signum, _frame) -> None:
+        for proc in procs:
+            if proc.is_alive():
+                os.kill(proc.pid, signum)
+
+    signal.signal(signal.SIGTERM, _forward)
+    # Ctrl+C already reaches every process in the foreground group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for proc in procs:
+        proc.join()
+    if any(proc.exitcode for proc in procs):
+        sys.exit(1)
+
+
+def run() -> None:
+    _setup_process()
+    settings = load_settings()
+    if settings.workers > 1:
+        if settings.bot_mode == "webhook":
+            _check_settings(settings)
+            _run_workers(settings)
+            return
+        # Telegram hands updates to a single getUpdates consumer per bot
+        logging.warning("WORKERS=%s requires BOT_MODE=webhook, running a single polling process", settings.workers)
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
+
+
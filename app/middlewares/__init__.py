@@ -0,0 +1,12 @@
+from .idempotency import IdempotencyMiddleware
+from .metrics import ApiMetricsMiddleware, HandlerMetricsMiddleware, UpdateMetricsMiddleware
+from .throttling import ThrottleStats, ThrottlingMiddleware
+
+__all__ = [
+    "ApiMetricsMiddleware",
+    "HandlerMetricsMiddleware",
+    "IdempotencyMiddleware",
+    "ThrottleStats",
+    "ThrottlingMiddleware",
+    "UpdateMetricsMiddleware",
+]
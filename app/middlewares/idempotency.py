@@ -0,0 +1,42 @@
+from typing import Any, Awaitable, Callable, Dict, List
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.db.dedupe import DedupeStore
+from app.utils.metrics import REGISTRY
+
+
+class IdempotencyMiddleware(BaseMiddleware):
+    """Drops updates that Telegram delivers again after they were already handled.
+
+    Register as an outer middleware on ``dp.update``. An update is marked before its handlers
+    run, so a redelivery racing the first attempt is dropped too.
+    """
+
+    def __init__(self, store: DedupeStore) -> None:
+        self.store = store
+        self.duplicates = 0
+        REGISTRY.callback_counter(
+            "bot_updates_redelivered_total",
+            "Updates dropped because they were already handled",
+            (),
+            lambda: {(): self.duplicates},
+        )
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+        keys: List[str] = [f"u{event.update_id}"]
+        if event.callback_query is not None:
+            # the same tap can come back under a new update id
+            keys.append(f"c{event.callback_query.id}")
+        if await self.store.seen(keys):
+            self.duplicates += 1
+            return None
+        return await handler(event, data)
@@ -0,0 +1,98 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from app.utils.metrics import REGISTRY, Registry
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Latency and failures of whole updates. Register as an outer middleware on ``dp.update``."""
+
+    def __init__(self, registry: Registry = REGISTRY) -> None:
+        self.seconds = registry.histogram("bot_update_duration_seconds", "Update processing latency", ("type",))
+        self.errors = registry.counter("bot_update_errors_total", "Updates whose processing raised", ("type",))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        kind = event.event_type if isinstance(event, Update) else type(event).__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors.inc(kind)
+            raise
+        finally:
+            self.seconds.observe(time.perf_counter() - started, kind)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Latency per handler function.
+
+    Register as an inner middleware on the dispatcher's observers: inner middlewares run once
+    the handler is chosen, and the dispatcher's ones apply to every included router.
+    """
+
+    def __init__(self, registry: Registry = REGISTRY) -> None:
+        self.seconds = registry.histogram("bot_handler_duration_seconds", "Handler latency", ("handler",))
+        self.errors = registry.counter("bot_handler_errors_total", "Handlers that raised", ("handler",))
+        self._names: Dict[Callable[..., Any], str] = {}
+
+    def _name(self, callback: Callable[..., Any]) -> str:
+        name = self._names.get(callback)
+        if name is None:
+            module = getattr(callback, "__module__", "") or ""
+            name = f"{module.rpartition('.')[2]}.{getattr(callback, '__qualname__', repr(callback))}"
+            self._names[callback] = name
+        return name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        if handler_object is None:
+            return await handler(event, data)
+        name = self._name(handler_object.callback)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors.inc(name)
+            raise
+        finally:
+            self.seconds.observe(time.perf_counter() - started, name)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Latency and errors of Telegram Bot API calls. Register on ``bot.session.middleware``."""
+
+    def __init__(self, registry: Registry = REGISTRY) -> None:
+        self.seconds = registry.histogram("bot_api_request_duration_seconds", "Bot API request latency", ("method",))
+        self.errors = registry.counter("bot_api_errors_total", "Bot API requests that failed", ("method", "error"))
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            self.errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            self.seconds.observe(time.perf_counter() - started, name)
@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import CallbackQuery, TelegramObject, User
+
+from app.utils import TokenBucket
+from app.utils.metrics import REGISTRY
+
+
+@dataclass
+class ThrottleStats:
+    passed: int = 0
+    throttled: int = 0
+    duplicates: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.throttled + self.duplicates
+
+
+class _UserState:
+    __slots__ = ("bucket", "last_data", "last_at")
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket = bucket
+        self.last_data: Optional[str] = None
+        self.last_at = 0.0
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Per-user rate limit for messages and callback queries.
+
+    Register the same instance as an outer middleware on both observers so a user shares one
+    bucket. A callback with the same data as the user's previous one within ``window`` seconds
+    is a double tap and is dropped without spending a token.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: float = 5.0, window: float = 1.0, max_users: int = 10_000) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.window = window
+        self.max_users = max(1, max_users)
+        self.stats = ThrottleStats()
+        self._users: "OrderedDict[int, _UserState]" = OrderedDict()
+        stats = self.stats
+        REGISTRY.callback_counter(
+            "bot_throttle_updates_total",
+            "Messages and callbacks seen by the per-user rate limit, by outcome",
+            ("outcome",),
+            lambda: {("passed",): stats.passed, ("throttled",): stats.throttled, ("duplicate",): stats.duplicates},
+        )
+
+    def _state(self, user_id: int) -> _UserState:
+        state = self._users.get(user_id)
+        if state is None:
+            state = _UserState(TokenBucket(self.rate, self.burst))
+            self._users[user_id] = state
+            if len(self._users) > self.max_users:
+                # an evicted user simply starts over with a full bucket
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return state
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        if user is None or self.rate <= 0:
+            return await handler(event, data)
+        state = self._state(user.id)
+        now = time.monotonic()
+        if isinstance(event, CallbackQuery) and event.data is not None:
+            if event.data == state.last_data and now - state.last_at < self.window:
+                self.stats.duplicates += 1
+                await self._answer(event)
+                return None
+            state.last_data = event.data
+            state.last_at = now
+        if not state.bucket.try_acquire():
+            self.stats.throttled += 1
+            if isinstance(event, CallbackQuery):
+                await self._answer(event, "Не так быстро 🙂")
+            return None
+        self.stats.passed += 1
+        return await handler(event, data)
+
+    @staticmethod
+    async def _answer(query: CallbackQuery, text: Optional[str] = None) -> None:
+        # stops the button spinner; a failure here is not worth more than the dropped update
+        with suppress(TelegramAPIError):
+            await query.answer(text)
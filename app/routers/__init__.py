@@ -1,8 +1,8 @@
-from .start import router as start
-from .library import router as library
-from .journal import router as journal
-from .checklists import router as checklists
-
-__all__ = ["start", "library", "journal", "checklists"]
-
-
+from .start import router as start
+from .library import router as library
+from .journal import router as journal
+from .checklists import router as checklists
+
+__all__ = ["start", "library", "journal", "checklists"]
+
+
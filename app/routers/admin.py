@@ -0,0 +1,46 @@
+from html import escape
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from app.context import get_db
+
+
+# main.py limits this router to ADMIN_IDS
+router = Router(name="admin")
+
+SQL_PREVIEW = 160
+
+
+@router.message(Command("slowqueries"))
+async def cmd_slow_queries(message: Message, command: CommandObject) -> None:
+    """/slowqueries [N] shows the statements with the most total time, /slowqueries reset clears them."""
+    profiler = get_db().profiler
+    if profiler is None:
+        await message.answer("Профилирование запросов выключено (DB_PROFILE=true).")
+        return
+    arg = (command.args or "").strip()
+    if arg == "reset":
+        profiler.reset()
+        await message.answer("Статистика запросов сброшена.")
+        return
+    stats = profiler.top(int(arg) if arg.isdigit() else 10)
+    if not stats:
+        await message.answer("Запросов пока не было.")
+        return
+    lines = [f"Порог медленного запроса: {profiler.slow_ms:.0f} мс"]
+    for i, stat in enumerate(stats, 1):
+        sql = stat.sql if len(stat.sql) <= SQL_PREVIEW else stat.sql[: SQL_PREVIEW - 1] + "…"
+        lines.append(
+            f"\n{i}. total {stat.total * 1000:.1f} мс, {stat.calls} раз, "
+            f"avg {stat.avg * 1000:.1f} / max {stat.max * 1000:.1f} мс, медленных {stat.slow}"
+            + (", full scan" if stat.full_scan else "")
+            + f"\n<code>{escape(sql)}</code>"
+        )
+    text = "\n".join(lines)
+    # Telegram caps a message at 4096 characters; drop entries from the end rather than cut a tag
+    while len(text) > 4096 and len(lines) > 2:
+        lines.pop()
+        text = "\n".join(lines)
+    await message.answer(text)
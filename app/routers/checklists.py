@@ -1,41 +1,72 @@
-from aiogram import Router, F
-from aiogram.filters import Command
-from aiogram.types import CallbackQuery, Message
-
-from app.context import get_db
-from app.keyboards.common import checklist_items_kb
-
-router = Router(name="checklists")
-
-
-@router.message(Command("checklists"))
-async def cmd_checklists(message: Message) -> None:
-    db = get_db()
-    cls = await db.list_checklists()
-    if not cls:
-        await message.answer("Пока нет чек-листов")
-        return
-    # пока 1 чек-лист, покажем его
-    code = cls[0]["code"]
-    items = await db.list_checklist_items(code)
-    triples = [(int(i["id"]), i["title"], int(i["done"])) for i in items]
-    await message.answer("Небольшая опора на сейчас — отметь то, что уже сделал:", reply_markup=checklist_items_kb(triples))
-
-
-@router.callback_query(F.data.startswith("cli:"))
-async def on_toggle(query: CallbackQuery) -> None:
-    db = get_db()
-    item_id = int(query.data.split(":", 1)[1])
-    await db.toggle_checklist_item(query.from_user.id, item_id)
-    # re-render current list (assume same checklist)
-    cls = await db.list_checklists()
-    if not cls:
-        await query.answer()
-        return
-    code = cls[0]["code"]
-    items = await db.list_checklist_items(code)
-    triples = [(int(i["id"]), i["title"], int(i["done"])) for i in items]
-    await query.message.edit_text("Хорошо! Можно добавить ещё что-то из списка:", reply_markup=checklist_items_kb(triples))
-    await query.answer()
-
-
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+
+from app.context import get_db
+from app.db.catalog import Checklist, Page
+from app.keyboards.common import checklist_items_kb, checklists_kb, page_nav, parse_cursor
+
+router = Router(name="checklists")
+
+
+def _checklists_markup(page: Page[Checklist]) -> InlineKeyboardMarkup:
+    data = [(c.code, c.title) for c in page.items]
+    return checklists_kb(data, page_nav("clp:", page, lambda c: c.code))
+
+
+@router.message(Command("checklists"))
+async def cmd_checklists(message: Message) -> None:
+    db = get_db()
+    cls = await db.list_checklists()
+    if not cls:
+        await message.answer("Пока нет чек-листов")
+        return
+    if len(cls) > 1:
+        page = await db.page_checklists()
+        await message.answer("Выбери чек-лист:", reply_markup=_checklists_markup(page))
+        return
+    code = cls[0]["code"]
+    triples = await db.list_checklist_items(message.from_user.id, code)
+    await message.answer("Небольшая опора на сейчас — отметь то, что уже сделал:", reply_markup=checklist_items_kb(triples))
+
+
+@router.callback_query(F.data.startswith("clp:"))
+async def on_checklists_page(query: CallbackQuery) -> None:
+    db = get_db()
+    after, before = parse_cursor(query.data.split(":", 1)[1])
+    page = await db.page_checklists(after=after, before=before)
+    await query.message.edit_text("Выбери чек-лист:", reply_markup=_checklists_markup(page))
+    await query.answer()
+
+
+@router.callback_query(F.data.startswith("cl:"))
+async def on_checklist(query: CallbackQuery) -> None:
+    db = get_db()
+    code = query.data.split(":", 1)[1]
+    triples = await db.list_checklist_items(query.from_user.id, code)
+    if not triples:
+        await query.answer("Не найдено", show_alert=True)
+        return
+    await query.message.edit_text(
+        "Небольшая опора на сейчас — отметь то, что уже сделал:",
+        reply_markup=checklist_items_kb(triples, back=True),
+    )
+    await query.answer()
+
+
+@router.callback_query(F.data.startswith("cli:"))
+async def on_toggle(query: CallbackQuery) -> None:
+    db = get_db()
+    item_id = int(query.data.split(":", 1)[1])
+    bits = await db.toggle_checklist_item(query.from_user.id, item_id)
+    if bits is None:
+        await query.answer()
+        return
+    # re-render the item's checklist from the catalog snapshot and the returned bitset
+    checklist = db.catalog.checklists_by_code[db.catalog.checklist_items_by_id[item_id].checklist_code]
+    triples = checklist.progress(bits)
+    markup = checklist_items_kb(triples, back=len(db.catalog.checklists) > 1)
+    await query.message.edit_text("Хорошо! Можно добавить ещё что-то из списка:", reply_markup=markup)
+    await query.answer()
+
+
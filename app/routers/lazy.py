@@ -0,0 +1,26 @@
+import importlib
+from typing import Any, Optional
+
+from aiogram import F, Router
+from aiogram.types import CallbackQuery
+
+
+def lazy_router(module: str, prefix: str) -> Router:
+    """Stand-in for a rarely used callback router that is imported on its first matching tap.
+
+    ``module`` must expose ``router`` whose callbacks all start with ``prefix``; until one
+    arrives the module is never imported, which keeps it off the startup path.
+    """
+    stub = Router(name=f"lazy:{module}")
+    target: Optional[Router] = None
+
+    @stub.callback_query(F.data.startswith(prefix))
+    async def _forward(query: CallbackQuery, **kwargs: Any) -> Any:
+        nonlocal target
+        if target is None:
+            target = importlib.import_module(module).router
+        # "handler" describes this stub; the target router fills in its own
+        kwargs.pop("handler", None)
+        return await target.propagate_event("callback_query", query, **kwargs)
+
+    return stub
@@ -1,44 +1,78 @@
-from aiogram import Router, F
-from aiogram.filters import Command
-from aiogram.types import CallbackQuery, Message
-
-from app.context import get_db
-from app.keyboards.common import categories_kb, practices_kb, practice_actions_kb
-from app.utils import format_practice
-
-router = Router(name="library")
-
-
-@router.message(Command("library"))
-async def cmd_library(message: Message) -> None:
-    db = get_db()
-    cats = await db.list_categories()
-    data = [(c["code"], c["title"]) for c in cats]
-    await message.answer("Выберите категорию:", reply_markup=categories_kb(data))
-
-
-@router.callback_query(F.data.startswith("cat:"))
-async def on_category(query: CallbackQuery) -> None:
-    db = get_db()
-    code = query.data.split(":", 1)[1]
-    practices = await db.list_practices_by_category(code)
-    data = [(int(p["id"]), p["title"]) for p in practices]
-    if not data:
-        await query.message.edit_text("В этой категории пока нет практик")
-    else:
-        await query.message.edit_text("Выберите практику:", reply_markup=practices_kb(data))
-    await query.answer()
-
-
-@router.callback_query(F.data.startswith("pr:"))
-async def on_practice(query: CallbackQuery) -> None:
-    db = get_db()
-    pid = int(query.data.split(":", 1)[1])
-    row = await db.get_practice(pid)
-    if not row:
-        await query.answer("Не найдено", show_alert=True)
-        return
-    await query.message.edit_text(format_practice(row), reply_markup=practice_actions_kb(pid))
-    await query.answer()
-
-
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+
+from app.context import get_db
+from app.db.catalog import Category, Page, Practice
+from app.keyboards.common import categories_kb, page_nav, parse_cursor, practices_kb
+from app.utils import render_practice
+
+router = Router(name="library")
+
+
+def _categories_markup(page: Page[Category]) -> InlineKeyboardMarkup:
+    data = [(c.code, c.title) for c in page.items]
+    return categories_kb(data, page_nav("catp:", page, lambda c: c.code))
+
+
+def _practices_markup(code: str, page: Page[Practice]) -> InlineKeyboardMarkup:
+    data = [(p.id, p.title) for p in page.items]
+    return practices_kb(data, page_nav(f"prp:{code}:", page, lambda p: p.id))
+
+
+@router.message(Command("library"))
+async def cmd_library(message: Message) -> None:
+    db = get_db()
+    page = await db.page_categories()
+    await message.answer("Выберите категорию:", reply_markup=_categories_markup(page))
+
+
+@router.callback_query(F.data.startswith("catp:"))
+async def on_categories_page(query: CallbackQuery) -> None:
+    db = get_db()
+    after, before = parse_cursor(query.data.split(":", 1)[1])
+    page = await db.page_categories(after=after, before=before)
+    await query.message.edit_reply_markup(reply_markup=_categories_markup(page))
+    await query.answer()
+
+
+@router.callback_query(F.data.startswith("cat:"))
+async def on_category(query: CallbackQuery) -> None:
+    db = get_db()
+    code = query.data.split(":", 1)[1]
+    page = await db.page_practices(code)
+    if not page.items:
+        await query.message.edit_text("В этой категории пока нет практик")
+    else:
+        await query.message.edit_text("Выберите практику:", reply_markup=_practices_markup(code, page))
+    await query.answer()
+
+
+@router.callback_query(F.data.startswith("prp:"))
+async def on_practices_page(query: CallbackQuery) -> None:
+    db = get_db()
+    # prp:<category code>:<direction><practice id>
+    _, code, cursor = query.data.split(":", 2)
+    after, before = parse_cursor(cursor)
+    page = await db.page_practices(
+        code,
+        after=int(after) if after else None,
+        before=int(before) if before else None,
+    )
+    await query.message.edit_reply_markup(reply_markup=_practices_markup(code, page))
+    await query.answer()
+
+
+@router.callback_query(F.data.startswith("pr:"))
+async def on_practice(query: CallbackQuery) -> None:
+    db = get_db()
+    pid = int(query.data.split(":", 1)[1])
+    row = await db.get_practice(pid)
+    if not row:
+        await query.answer("Не найдено", show_alert=True)
+        return
+    text, markup = render_practice(row, db.catalog.version)
+    await query.message.edit_text(text, reply_markup=markup)
+    await query.answer()
+
+
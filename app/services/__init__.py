@@ -1,3 +1,7 @@
+from .broadcast import BroadcastStats, Broadcaster
+from .content import ContentWatcher
+from .metrics import MetricsServer
+from .reminders import ReminderService
 from .scheduler import SchedulerService
 
-__all__ = ["SchedulerService"]
+__all__ = ["Broadcaster", "BroadcastStats", "ContentWatcher", "MetricsServer", "ReminderService", "SchedulerService"]
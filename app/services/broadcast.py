@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+from app.utils import TokenBucket
+from app.utils.metrics import REGISTRY
+
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows roughly 30 messages per second overall and one per second to the same chat
+PER_CHAT_INTERVAL = 1.0
+# tokens stored while idle: about one second of that global limit, whatever the configured rate
+MAX_BURST = 30.0
+
+_RUNNING = REGISTRY.gauge("bot_broadcasts_running", "Broadcasts in progress")
+_QUEUED = REGISTRY.gauge("bot_broadcast_queued", "Broadcast messages waiting for a worker")
+_MESSAGES = REGISTRY.counter("bot_broadcast_messages_total", "Broadcast messages by outcome", ("outcome",))
+_THROTTLED = REGISTRY.counter("bot_broadcast_throttled_total", "Flood-control waits during broadcasts")
+
+
+class Outcome(enum.Enum):
+    SENT = "sent"
+    # rejected for good (bad request, unexpected error): sending again would fail the same way
+    FAILED = "failed"
+    # network trouble, 5xx or flood control outlasted the retries; worth another try later
+    RETRYABLE = "retryable"
+    BLOCKED = "blocked"
+
+
+@dataclass
+class BroadcastJob:
+    chat_id: int
+    text: str
+    reply_markup: Any = None
+    payload: Any = None
+
+
+@dataclass
+class BroadcastStats:
+    sent: int = 0
+    failed: int = 0
+    retryable: int = 0
+    blocked: int = 0
+    throttled: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def summary(self) -> str:
+        return (
+            f"sent={self.sent} failed={self.failed} retryable={self.retryable} blocked={self.blocked} "
+            f"throttled={self.throttled} in {self.elapsed:.1f}s"
+        )
+
+
+ResultCallback = Callable[[BroadcastJob, Outcome], Awaitable[None]]
+
+
+class Broadcaster:
+    """Bounded worker pool that delivers messages under Telegram's rate limits."""
+
+    def __init__(self, bot: Bot, workers: int = 8, rate: float = 25.0, max_retries: int = 3) -> None:
+        self.bot = bot
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self._bucket = TokenBucket(rate, capacity=max(1.0, min(rate, MAX_BURST)))
+        self._chat_next: Dict[int, float] = {}
+
+    async def run(self, jobs: AsyncIterable[BroadcastJob], on_result: Optional[ResultCallback] = None) -> BroadcastStats:
+        stats = BroadcastStats()
+        # bounded so that a fast producer waits for the workers instead of buffering everyone
+        queue: asyncio.Queue[Optional[BroadcastJob]] = asyncio.Queue(maxsize=self.workers * 2)
+        workers = [asyncio.create_task(self._worker(queue, stats, on_result)) for _ in range(self.workers)]
+        _RUNNING.inc()
+        try:
+            async for job in jobs:
+                await queue.put(job)
+                _QUEUED.inc()
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            self._chat_next.clear()
+            _RUNNING.dec()
+            # jobs left behind by a cancelled run
+            while not queue.empty():
+                if queue.get_nowait() is not None:
+                    _QUEUED.dec()
+            stats.finished_at = time.monotonic()
+        return stats
+
+    async def _worker(self, queue: asyncio.Queue, stats: BroadcastStats, on_result: Optional[ResultCallback]) -> None:
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            _QUEUED.dec()
+            outcome = await self._deliver(job, stats)
+            _MESSAGES.inc(outcome.value)
+            if outcome is Outcome.SENT:
+                stats.sent += 1
+            elif outcome is Outcome.BLOCKED:
+                stats.blocked += 1
+            elif outcome is Outcome.RETRYABLE:
+                stats.retryable += 1
+            else:
+                stats.failed += 1
+            if on_result is not None:
+                try:
+                    await on_result(job, outcome)
+                except Exception:
+                    logger.exception("Broadcast result callback failed for chat %s", job.chat_id)
+
+    async def _wait_chat(self, chat_id: int) -> None:
+        now = time.monotonic()
+        if len(self._chat_next) >= 10_000:
+            self._chat_next = {cid: t for cid, t in self._chat_next.items() if t > now}
+        ready_at = self._chat_next.get(chat_id, 0.0)
+        self._chat_next[chat_id] = max(now, ready_at) + PER_CHAT_INTERVAL
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+
+    async def _deliver(self, job: BroadcastJob, stats: BroadcastStats) -> Outcome:
+        attempt = 0
+        while True:
+            await self._wait_chat(job.chat_id)
+            await self._bucket.acquire()
+            delay = 0.0
+            try:
+                await self.bot.send_message(job.chat_id, job.text, reply_markup=job.reply_markup)
+                return Outcome.SENT
+            except TelegramRetryAfter as e:
+                # flood control applies to the whole bot, so every worker backs off
+                stats.throttled += 1
+                _THROTTLED.inc()
+                self._bucket.pause(e.retry_after)
+            except TelegramForbiddenError:
+                return Outcome.BLOCKED
+            except TelegramBadRequest as e:
+                logger.info("Broadcast to %s rejected: %s", job.chat_id, e.message)
+                return Outcome.FAILED
+            except (TelegramNetworkError, TelegramServerError):
+                delay = min(2.0 ** attempt, 30.0)
+            except Exception:
+                logger.exception("Broadcast to %s failed", job.chat_id)
+                return Outcome.FAILED
+            attempt += 1
+            if attempt > self.max_retries:
+                logger.warning("Broadcast to %s gave up after %s attempts", job.chat_id, attempt)
+                return Outcome.RETRYABLE
+            if delay:
+                await asyncio.sleep(delay)
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Optional
+
+from app.db.db import Database
+
+
+logger = logging.getLogger(__name__)
+
+
+class ContentWatcher:
+    """Picks up content imported by ``python -m app.admin import-content`` without a restart.
+
+    Every ``interval`` seconds it compares ``meta.content_version`` with the version the
+    catalog snapshot was read at and swaps in a fresh snapshot when they differ.
+    """
+
+    def __init__(self, db: Database, interval: float = 30.0) -> None:
+        self.db = db
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if await self.db.refresh_catalog():
+                    logger.info("Catalog reloaded: content version %s", self.db.catalog.version)
+            except Exception:
+                logger.exception("Catalog refresh failed")
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import suppress
+from typing import Awaitable, Callable, Optional
+
+from app.db.db import Database
+
+
+logger = logging.getLogger(__name__)
+
+Hook = Callable[[], Awaitable[None]]
+
+
+class LeaderLease:
+    """Elects one process per database file to run scheduled jobs.
+
+    Every process tries to take the lease row every ``ttl / 3`` seconds; the holder renews it,
+    the others take over once it has not been renewed for ``ttl`` seconds. ``on_acquired`` and
+    ``on_lost`` start and stop the leader-only services.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        name: str,
+        on_acquired: Hook,
+        on_lost: Hook,
+        ttl: float = 30.0,
+    ) -> None:
+        self.db = db
+        self.name = name
+        self.ttl = max(3.0, ttl)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._on_acquired = on_acquired
+        self._on_lost = on_lost
+        self._is_leader = False
+        self._renewed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        await self._tick()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop renewing, stop leader-only work and hand the lease over right away."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._is_leader:
+            await self._step_down()
+            try:
+                await self.db.release_lease(self.name, self.holder)
+            except Exception:
+                logger.exception("Failed to release lease %s", self.name)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            await self._tick()
+
+    async def _tick(self) -> None:
+        try:
+            held = await self.db.acquire_lease(self.name, self.holder, self.ttl)
+        except Exception:
+            logger.exception("Lease %s renewal failed", self.name)
+            # keep going until our last successful renewal runs out, then assume someone took over
+            held = self._is_leader and time.monotonic() - self._renewed_at < self.ttl * 2 / 3
+        else:
+            if held:
+                self._renewed_at = time.monotonic()
+        if held and not self._is_leader:
+            logger.info("Acquired lease %s as %s", self.name, self.holder)
+            self._is_leader = True
+            try:
+                await self._on_acquired()
+            except Exception:
+                logger.exception("Failed to start leader-only services")
+        elif not held and self._is_leader:
+            logger.warning("Lost lease %s", self.name)
+            await self._step_down()
+
+    async def _step_down(self) -> None:
+        self._is_leader = False
+        try:
+            await self._on_lost()
+        except Exception:
+            logger.exception("Failed to stop leader-only services")
@@ -0,0 +1,47 @@
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from app.utils.metrics import REGISTRY, Registry
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """Serves ``registry`` over HTTP for a Prometheus scraper."""
+
+    def __init__(self, host: str, port: int, registry: Registry = REGISTRY, path: str = "/metrics") -> None:
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.path = path
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get(self.path, self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError:
+            await runner.cleanup()
+            # the bot itself works fine without it
+            logger.warning("Metrics endpoint could not bind %s:%s", self.host, self.port, exc_info=True)
+            return
+        self._runner = runner
+        logger.info("Metrics available on http://%s:%s%s", self.host, self.port, self.path)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
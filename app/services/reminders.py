@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+
+from app.config import Settings
+from app.db.db import Database
+from app.services.broadcast import BroadcastJob, Broadcaster
+from app.utils import render_practice
+from app.utils.metrics import JOB_BUCKETS, REGISTRY
+
+
+logger = logging.getLogger(__name__)
+
+# upper bound for one sleep, so clock jumps and lost wakeups cost at most this much delay
+MAX_IDLE_SECONDS = 60.0
+# callback data comes from the client, so the delay is clamped rather than trusted
+MAX_DELAY_SECONDS = 7 * 24 * 3600
+
+_Entry = Tuple[int, int, int]  # (due_at, user_id, practice_id)
+
+_JOB_SECONDS = REGISTRY.histogram("bot_job_duration_seconds", "Scheduled job run time", ("job",), JOB_BUCKETS)
+
+
+@dataclass
+class ReminderService:
+    """Delivers practice reminders from a min-heap mirrored in the ``reminders`` table.
+
+    The table is the source of truth and is loaded once at start. Reminders created by other
+    worker processes are picked up by re-reading the rows due within the next idle period on
+    every wakeup. Moving a reminder pushes a new entry and leaves the old one in the heap: it
+    is skipped on pop because it no longer matches ``_pending``.
+    """
+
+    bot: Bot
+    db: Database
+    settings: Settings
+    _heap: List[_Entry] = field(default_factory=list)
+    _pending: Dict[Tuple[int, int], int] = field(default_factory=dict)
+    _wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    _task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._heap = await self.db.list_reminders()
+        heapq.heapify(self._heap)
+        self._pending = {(uid, pid): due_at for due_at, uid, pid in self._heap}
+        logger.info("Loaded %s pending reminders", len(self._pending))
+        REGISTRY.callback_gauge("bot_reminders_pending", "Reminders waiting for delivery", (), lambda: {(): len(self._pending)})
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def schedule(self, user_id: int, practice_id: int, delay_seconds: int) -> int:
+        due_at = int(time.time()) + min(max(0, delay_seconds), MAX_DELAY_SECONDS)
+        await self.db.upsert_reminder(user_id, practice_id, due_at)
+        if self._task is not None:
+            self._push((due_at, user_id, practice_id))
+        # otherwise the process that runs reminders reads the row from the table
+        return due_at
+
+    def _push(self, entry: _Entry) -> None:
+        due_at, uid, pid = entry
+        self._pending[(uid, pid)] = due_at
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._pending) + 1024:
+            # too many superseded entries: rebuild from the live ones
+            self._heap = [(d, u, p) for (u, p), d in self._pending.items()]
+            heapq.heapify(self._heap)
+        if self._heap[0] == entry:
+            self._wakeup.set()
+
+    def _next_delay(self, now: float) -> float:
+        while self._heap:
+            due_at, uid, pid = self._heap[0]
+            if self._pending.get((uid, pid)) == due_at:
+                return min(max(0.0, due_at - now), MAX_IDLE_SECONDS)
+            heapq.heappop(self._heap)
+        return MAX_IDLE_SECONDS
+
+    def _pop_due(self, now: float, limit: int) -> List[_Entry]:
+        due: List[_Entry] = []
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            entry = heapq.heappop(self._heap)
+            due_at, uid, pid = entry
+            if self._pending.get((uid, pid)) != due_at:
+                continue
+            del self._pending[(uid, pid)]
+            due.append(entry)
+        return due
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self._next_delay(time.time()))
+            try:
+                with _JOB_SECONDS.time("reminders"):
+                    await self._sync()
+                    await self._deliver_due()
+            except Exception:
+                logger.exception("Reminder delivery failed")
+
+    async def _sync(self) -> None:
+        rows = await self.db.list_reminders(due_before=int(time.time() + MAX_IDLE_SECONDS))
+        for due_at, uid, pid in rows:
+            if self._pending.get((uid, pid)) != due_at:
+                self._push((due_at, uid, pid))
+
+    async def _iter_jobs(self, batch: List[_Entry]) -> AsyncIterator[BroadcastJob]:
+        catalog = self.db.catalog
+        for entry in batch:
+            _, uid, pid = entry
+            practice = catalog.practices_by_id.get(pid)
+            if practice is None or not practice.is_active:
+                continue
+            text, markup = render_practice(practice, catalog.version)
+            yield BroadcastJob(chat_id=uid, text="⏰ Напоминание\n\n" + text, reply_markup=markup, payload=entry)
+
+    async def _deliver_due(self) -> None:
+        batch_size = max(1, self.settings.reminder_batch_size)
+        while True:
+            batch = self._pop_due(time.time(), batch_size)
+            if not batch:
+                return
+            broadcaster = Broadcaster(
+                self.bot,
+                workers=self.settings.broadcast_workers,
+                rate=self.settings.broadcast_rate,
+            )
+            stats = await broadcaster.run(self._iter_jobs(batch))
+            # every outcome is final: retries already happened inside the broadcaster
+            await self.db.delete_reminders(batch)
+            logger.info("Reminders: %s", stats.summary())
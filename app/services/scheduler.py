@@ -1,54 +1,149 @@
-from __future__ import annotations
-
-import asyncio
-import datetime as dt
-from dataclasses import dataclass
-from typing import Optional
-
-from aiogram import Bot
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-
-from app.config import Settings
-from app.db.db import Database
-from app.utils import format_practice
-
-
-@dataclass
-class SchedulerService:
-    bot: Bot
-    db: Database
-    settings: Settings
-    _scheduler: Optional[AsyncIOScheduler] = None
-
-    async def start(self) -> None:
-        if self._scheduler is not None:
-            return
-        self._scheduler = AsyncIOScheduler(timezone=self.settings.tz)
-        # daily practice push (default time from env)
-        hh, mm = (self.settings.daily_default_time or "09:00").split(":", 1)
-        self._scheduler.add_job(self._send_daily_practice, CronTrigger(hour=int(hh), minute=int(mm)))
-        self._scheduler.start()
-
-    async def stop(self) -> None:
-        if self._scheduler is not None:
-            self._scheduler.shutdown(wait=False)
-            self._scheduler = None
-
-    async def _send_daily_practice(self) -> None:
-        rows = await self.db.list_users_for_daily()
-        if not rows:
-            return
-        practice = await self.db.random_practice()
-        if not practice:
-            return
-        text = "🎲 Практика дня\n\n" + format_practice(practice)
-        today = dt.date.today().isoformat()
-        for uid in rows:
-            try:
-                await self.bot.send_message(uid, text)
-                await self.db.set_last_daily_sent(uid, today)
-            except Exception:
-                continue
-
-
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Tuple
+
+from aiogram import Bot
+
+from app.config import Settings
+from app.db.db import Database
+from app.services.broadcast import BroadcastJob, Broadcaster, Outcome
+from app.utils import render_practice
+from app.utils.metrics import JOB_BUCKETS, REGISTRY
+from app.utils.timezones import resolve_zone
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+
+logger = logging.getLogger(__name__)
+
+# users.daily_next_at is stored as a UTC minute so that plain string comparison works in SQL
+MINUTE_FORMAT = "%Y-%m-%d %H:%M"
+# a push that failed for a transient reason (Outcome.RETRYABLE) is tried again this much later
+DAILY_RETRY_DELAY = dt.timedelta(minutes=5)
+
+_JOB_SECONDS = REGISTRY.histogram("bot_job_duration_seconds", "Scheduled job run time", ("job",), JOB_BUCKETS)
+
+
+def _parse_hhmm(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    try:
+        hh, mm = (value or "").strip().split(":", 1)
+        hour, minute = int(hh), int(mm)
+    except ValueError:
+        return None
+    if 0 <= hour < 24 and 0 <= minute < 60:
+        return hour, minute
+    return None
+
+
+def next_daily_due(
+    daily_time: Optional[str],
+    timezone: Optional[str],
+    now: dt.datetime,
+    settings: Settings,
+) -> Tuple[str, str]:
+    """Return (utc minute, local date) of the first send strictly after ``now``."""
+    tz = resolve_zone(timezone, settings.tz)
+    hour, minute = _parse_hhmm(daily_time) or _parse_hhmm(settings.daily_default_time) or (9, 0)
+    local_now = now.astimezone(tz)
+    due = dt.datetime.combine(local_now.date(), dt.time(hour, minute), tzinfo=tz)
+    if due <= local_now:
+        due = dt.datetime.combine(local_now.date() + dt.timedelta(days=1), dt.time(hour, minute), tzinfo=tz)
+    return due.astimezone(dt.timezone.utc).strftime(MINUTE_FORMAT), due.date().isoformat()
+
+
+@dataclass
+class SchedulerService:
+    bot: Bot
+    db: Database
+    settings: Settings
+    _scheduler: Optional["AsyncIOScheduler"] = None
+
+    async def start(self) -> None:
+        if self._scheduler is not None:
+            return
+        # imported here: only the worker holding the scheduler lease ever needs APScheduler
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from apscheduler.triggers.cron import CronTrigger
+
+        self._scheduler = AsyncIOScheduler(timezone=self.settings.tz)
+        # daily practice push: every minute send to the users whose local send time has come
+        self._scheduler.add_job(
+            self._send_daily_practice,
+            CronTrigger(minute="*"),
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=30,
+        )
+        self._scheduler.start()
+
+    async def stop(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+
+    async def _schedule_new_users(self, now: dt.datetime) -> None:
+        batch = self.settings.daily_batch_size
+        while True:
+            rows = await self.db.list_users_unscheduled_daily(batch)
+            if not rows:
+                return
+            items = []
+            for row in rows:
+                next_at, next_day = next_daily_due(row["daily_time"], row["timezone"], now, self.settings)
+                items.append((int(row["user_id"]), next_at, next_day))
+            await self.db.set_daily_next(items)
+            if len(rows) < batch:
+                return
+
+    async def _iter_daily_jobs(self, now: dt.datetime, text: str) -> AsyncIterator[BroadcastJob]:
+        # pulled by the broadcaster's bounded queue, so pages are read only as fast as messages go out
+        users = self.db.iter_users_due_daily(now.strftime(MINUTE_FORMAT), max(1, self.settings.daily_batch_size))
+        retry_at = (now + DAILY_RETRY_DELAY).strftime(MINUTE_FORMAT)
+        async for row in users:
+            # the next send is computed from now, so a user missed during downtime gets one catch-up
+            next_at, next_day = next_daily_due(row["daily_time"], row["timezone"], now, self.settings)
+            yield BroadcastJob(
+                chat_id=int(row["user_id"]),
+                text=text,
+                payload=(row["daily_next_day"], next_at, next_day, retry_at),
+            )
+
+    async def _on_daily_result(self, job: BroadcastJob, outcome: Outcome) -> None:
+        sent_day, next_at, next_day, retry_at = job.payload
+        if outcome is Outcome.SENT:
+            await self.db.set_last_daily_sent(job.chat_id, sent_day, next_at, next_day)
+        elif outcome is Outcome.BLOCKED:
+            await self.db.disable_daily(job.chat_id)
+        elif outcome is Outcome.RETRYABLE and retry_at < next_at:
+            # keep the pending day, so a later tick tries today's push again
+            await self.db.set_daily_next([(job.chat_id, retry_at, sent_day)])
+        else:
+            # a permanent failure, or the next send is due before the retry would be: today's push is lost
+            await self.db.set_daily_next([(job.chat_id, next_at, next_day)])
+
+    async def _send_daily_practice(self) -> None:
+        with _JOB_SECONDS.time("daily_practice"):
+            await self._run_daily_practice()
+
+    async def _run_daily_practice(self) -> None:
+        now = dt.datetime.now(dt.timezone.utc)
+        # results of the previous tick may still sit in the write-behind buffer
+        await self.db.flush()
+        await self._schedule_new_users(now)
+        practice = await self.db.random_practice()
+        if not practice:
+            return
+        text = "🎲 Практика дня\n\n" + render_practice(practice, self.db.catalog.version)[0]
+        broadcaster = Broadcaster(
+            self.bot,
+            workers=self.settings.broadcast_workers,
+            rate=self.settings.broadcast_rate,
+        )
+        stats = await broadcaster.run(self._iter_daily_jobs(now, text), on_result=self._on_daily_result)
+        await self.db.flush()
+        if stats.sent or stats.failed or stats.retryable or stats.blocked:
+            logger.info("Daily practice broadcast: %s", stats.summary())
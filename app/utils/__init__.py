@@ -1,5 +1,6 @@
-from .formatting import format_practice
-
-__all__ = ["format_practice"]
-
-
+from .formatting import format_practice, render_practice
+from .ratelimit import TokenBucket
+
+__all__ = ["format_practice", "render_practice", "TokenBucket"]
+
+
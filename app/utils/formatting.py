@@ -1,17 +1,40 @@
-import json
-
-
-def format_practice(row) -> str:
-    steps = []
-    if row["steps_json"]:
-        try:
-            steps = json.loads(row["steps_json"]) or []
-        except Exception:
-            steps = []
-    steps_text = "\n".join([f"• {s}" for s in steps]) if steps else ""
-    desc = row["description"] or ""
-    timer = row["timer_seconds"]
-    timer_text = f"\n⏱️ Попробуй уделить этому {timer} секунд. Я напомню, когда время выйдет." if timer else ""
-    return f"<b>{row['title']}</b>\n\n{desc}\n\n{steps_text}{timer_text}"
-
-
+import json
+from typing import Dict, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from app.keyboards.common import practice_actions_kb
+
+
+def format_practice(row) -> str:
+    steps = []
+    if row["steps_json"]:
+        try:
+            steps = json.loads(row["steps_json"]) or []
+        except Exception:
+            steps = []
+    steps_text = "\n".join([f"• {s}" for s in steps]) if steps else ""
+    desc = row["description"] or ""
+    timer = row["timer_seconds"]
+    timer_text = f"\n⏱️ Попробуй уделить этому {timer} секунд. Я напомню, когда время выйдет." if timer else ""
+    return f"<b>{row['title']}</b>\n\n{desc}\n\n{steps_text}{timer_text}"
+
+
+# (catalog version, practice id) -> (text, markup); entries of older versions are dropped on first miss
+_render_cache: Dict[Tuple[int, int], Tuple[str, InlineKeyboardMarkup]] = {}
+_render_version = 0
+
+
+def render_practice(row, catalog_version: int) -> Tuple[str, InlineKeyboardMarkup]:
+    global _render_version
+    pid = int(row["id"])
+    key = (catalog_version, pid)
+    cached = _render_cache.get(key)
+    if cached is not None:
+        return cached
+    if catalog_version != _render_version:
+        _render_cache.clear()
+        _render_version = catalog_version
+    rendered = (format_practice(row), practice_actions_kb(pid))
+    _render_cache[key] = rendered
+    return rendered
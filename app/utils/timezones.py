@@ -0,0 +1,17 @@
+import datetime as dt
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def resolve_zone(name: Optional[str], default: str) -> dt.tzinfo:
+    """User timezone if it is valid, otherwise the configured default, otherwise UTC."""
+    return get_zone(name or "") or get_zone(default) or dt.timezone.utc
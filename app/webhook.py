@@ -0,0 +1,102 @@
+import asyncio
+import hmac
+import logging
+import signal
+from contextlib import suppress
+from typing import Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from pydantic import ValidationError
+
+from app.config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# how long shutdown waits for handlers that are still running
+DRAIN_TIMEOUT = 30.0
+
+
+class WebhookHandler:
+    """Accepts Telegram updates over HTTP and processes them in the background.
+
+    Telegram only needs a 200 to stop redelivering, so the response is sent as soon as the
+    update is parsed and the handlers run as tracked tasks that shutdown waits for.
+    """
+
+    def __init__(self, bot: Bot, dp: Dispatcher, secret: str) -> None:
+        if not secret:
+            raise ValueError("A webhook secret is required")
+        self.bot = bot
+        self.dp = dp
+        self.secret = secret
+        self._tasks: Set[asyncio.Task] = set()
+        self._accepting = True
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, "").encode(), self.secret.encode()):
+            return web.Response(status=401)
+        if not self._accepting:
+            # let Telegram retry against whichever instance is still up
+            return web.Response(status=503)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except (ValueError, ValidationError):
+            return web.Response(status=400)
+        task = asyncio.create_task(self._feed(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _feed(self, update: Update) -> None:
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception:
+            logger.exception("Failed to process update %s", update.update_id)
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        self._accepting = False
+        if not self._tasks:
+            return
+        logger.info("Waiting for %s in-flight updates", len(self._tasks))
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Cancelled %s updates still running after %.0fs", len(pending), timeout)
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, settings: Settings, register: bool = True) -> None:
+    handler = WebhookHandler(bot, dp, settings.webhook_secret)
+    app = web.Application()
+    app.router.add_post(settings.webhook_path, handler.handle)
+    runner = web.AppRunner(app)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # not available on Windows; Ctrl+C still cancels the main task there
+        with suppress(NotImplementedError, RuntimeError):
+            loop.add_signal_handler(sig, stop.set)
+
+    await dp.emit_startup(bot=bot)
+    try:
+        await runner.setup()
+        # with several workers the kernel spreads incoming connections across the processes
+        site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port, reuse_port=settings.workers > 1 or None)
+        await site.start()
+        if register and settings.webhook_url:
+            await bot.set_webhook(
+                url=settings.webhook_url.rstrip("/") + settings.webhook_path,
+                secret_token=settings.webhook_secret,
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+        logger.info("Webhook server listening on %s:%s%s", settings.webhook_host, settings.webhook_port, settings.webhook_path)
+        await stop.wait()
+    finally:
+        await handler.drain()
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot)
@@ -0,0 +1,120 @@
+"""Offline stand-ins for the Bot API shared by the benchmarks."""
+import asyncio
+import json
+import math
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import SendMessage, TelegramMethod
+from aiogram.types import Chat, Message
+
+Reply = Tuple[int, Dict[str, Any]]
+
+
+class FakeTelegram:
+    """Telegram's flood control for ``sendMessage``, answered in process."""
+
+    def __init__(self, rate: float = 30.0, per_chat_interval: float = 1.0, blocked: float = 0.0) -> None:
+        self.rate = rate
+        self.per_chat_interval = per_chat_interval
+        self.blocked_per_mille = int(blocked * 1000)
+        self._allowance = rate
+        self._updated = time.monotonic()
+        self._chat_next: Dict[int, float] = {}
+        self.accepted = 0
+        self.flood_replies = 0
+        self.blocked_replies = 0
+
+    @staticmethod
+    def _flood(wait: float) -> Reply:
+        # Telegram reports whole seconds, never zero
+        retry_after = max(1, math.ceil(wait))
+        return 429, {
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {retry_after}",
+            "parameters": {"retry_after": retry_after},
+        }
+
+    def send_message(self, chat_id: int, text: str) -> Reply:
+        now = time.monotonic()
+        self._allowance = min(self.rate, self._allowance + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._allowance < 1:
+            self.flood_replies += 1
+            return self._flood((1 - self._allowance) / self.rate)
+        ready_at = self._chat_next.get(chat_id, 0.0)
+        if ready_at > now:
+            self.flood_replies += 1
+            return self._flood(ready_at - now)
+        self._allowance -= 1
+        if len(self._chat_next) >= 10_000:
+            self._chat_next = {cid: t for cid, t in self._chat_next.items() if t > now}
+        self._chat_next[chat_id] = now + self.per_chat_interval
+        if chat_id % 1000 < self.blocked_per_mille:
+            self.blocked_replies += 1
+            return 403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+        self.accepted += 1
+        message = {
+            "message_id": self.accepted,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text,
+        }
+        return 200, {"ok": True, "result": message}
+
+    def handle(self, method: str, chat_id: Any, text: Any) -> Reply:
+        if method.lower() == "sendmessage":
+            return self.send_message(int(chat_id), str(text))
+        return 200, {"ok": True, "result": True}
+
+
+class FakeSession(BaseSession):
+    """Bot session that counts API calls and answers them locally.
+
+    With ``api`` set, ``sendMessage`` goes through its flood control and the reply is parsed
+    like a real one, so 429 and 403 surface as the usual aiogram exceptions.
+    """
+
+    def __init__(self, api: Optional[FakeTelegram] = None, latency: float = 0.0) -> None:
+        super().__init__()
+        self.api = api
+        self.latency = latency
+        self.calls: Counter = Counter()
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None) -> Any:
+        self.calls[method.__api_method__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.api is not None and isinstance(method, SendMessage):
+            status, body = self.api.send_message(int(method.chat_id), method.text)
+            return self.check_response(bot, method, status, json.dumps(body)).result
+        returning = method.__returning__
+        if returning is Message or Message in getattr(returning, "__args__", ()):
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message(
+                message_id=1,
+                date=datetime.now(timezone.utc),
+                chat=Chat(id=int(chat_id), type="private"),
+                text=getattr(method, "text", None),
+            )
+        return True
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        # the bot downloads no files; should one appear, it comes back empty
+        for chunk in ():
+            yield chunk
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,180 @@
+"""Time the daily practice push against a fake Telegram API, without network access.
+
+    python -m benchmarks.broadcast --users 10000,100000 --rate 2000 --api-rate 2500
+
+Seeds a temporary database with users whose daily push is due and runs
+``SchedulerService._send_daily_practice`` once per size. The fake API answers like Telegram:
+a global messages-per-second budget and one message per second per chat, with 429
+``retry_after`` replies past either, and 403 for a share of users that blocked the bot.
+At Telegram's real limit of about 30 messages per second the push takes at least
+users / 30 seconds, so large sizes are run with both rates raised to measure the bot itself.
+"""
+import argparse
+import asyncio
+import dataclasses
+import resource
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+
+from app.config import Settings, load_settings
+from app.db.db import Database
+from app.main import _open_database
+from app.services.scheduler import MINUTE_FORMAT, SchedulerService
+
+from ._fake import FakeSession, FakeTelegram
+
+FIRST_USER_ID = 1_000_000
+BOT_ID = 42
+
+
+async def serve_fake_api(api: FakeTelegram) -> Tuple[web.AppRunner, str]:
+    """Expose ``api`` on a loopback port, for runs that include the HTTP round trip."""
+
+    async def endpoint(request: web.Request) -> web.Response:
+        form = await request.post()
+        status, body = api.handle(request.match_info["method"], form.get("chat_id"), form.get("text"))
+        return web.json_response(body, status=status)
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", endpoint)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+def seed_users(path: str, users: int) -> str:
+    """Insert ``users`` users whose daily push was due a minute ago; returns the pushed day."""
+    now = datetime.now(timezone.utc)
+    due_at = (now - timedelta(minutes=1)).strftime(MINUTE_FORMAT)
+    day = now.date().isoformat()
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO users(user_id, first_name, daily_time, daily_next_at, daily_next_day) VALUES(?, ?, '09:00', ?, ?)",
+                ((FIRST_USER_ID + i, f"user{i}", due_at, day) for i in range(users)),
+            )
+    finally:
+        conn.close()
+    return day
+
+
+def count_commits(db: Database) -> List[int]:
+    """Count commits on the writer connection; the returned list holds the running total."""
+    conn = db._conn
+    counter = [0]
+    commit = conn.commit
+
+    async def counting_commit() -> None:
+        counter[0] += 1
+        await commit()
+
+    conn.commit = counting_commit
+    return counter
+
+
+def max_rss_mb() -> float:
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_size(settings: Settings, users: int, args: argparse.Namespace) -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="bot-broadcast-"))
+    settings = dataclasses.replace(settings, db_path=str(workdir / "bench.db"))
+    api = FakeTelegram(rate=args.api_rate, per_chat_interval=args.per_chat_interval, blocked=args.blocked)
+    runner: Optional[web.AppRunner] = None
+    if args.http:
+        runner, base = await serve_fake_api(api)
+        session: BaseSession = AiohttpSession(api=TelegramAPIServer.from_base(base))
+    else:
+        session = FakeSession(api)
+    bot = Bot(token=f"{BOT_ID}:BENCH", session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    db = _open_database(settings)
+    try:
+        await db.init()
+        seed_started = time.perf_counter()
+        day = seed_users(settings.db_path, users)
+        seeded = time.perf_counter() - seed_started
+        commits = count_commits(db)
+        scheduler = SchedulerService(bot=bot, db=db, settings=settings)
+        if args.tracemalloc:
+            tracemalloc.start()
+        started = time.perf_counter()
+        await scheduler._send_daily_practice()
+        elapsed = time.perf_counter() - started
+        peak_traced = tracemalloc.get_traced_memory()[1] / 2**20 if args.tracemalloc else None
+        tracemalloc.stop()
+        async with db._reader() as conn, conn.execute(
+            "SELECT COUNT(*) FROM users WHERE last_daily_sent = ? OR daily_enabled = 0", (day,)
+        ) as cur:
+            (done,) = await cur.fetchone()
+    finally:
+        await db.close()
+        await bot.session.close()
+        if runner is not None:
+            await runner.cleanup()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    handled = api.accepted + api.blocked_replies
+    print(f"users={users} (seeded in {seeded:.1f}s)")
+    print(f"  wall time     {elapsed:.2f}s")
+    print(f"  send rate     {api.accepted / elapsed:.0f} msg/s ({handled} delivered or blocked)")
+    print(f"  429 replies   {api.flood_replies}")
+    print(f"  db commits    {commits[0]}")
+    # users whose push got recorded: either sent today or switched off after a 403
+    print(f"  users done    {done}")
+    if peak_traced is not None:
+        print(f"  peak traced   {peak_traced:.1f} MiB")
+    print(f"  max RSS       {max_rss_mb():.0f} MiB (process-wide)")
+    print(f"  at Telegram's 30 msg/s the same push takes at least {users / 30 / 60:.0f} min")
+
+
+async def run(args: argparse.Namespace) -> None:
+    settings = dataclasses.replace(load_settings(), workers=1)
+    if args.rate is not None:
+        settings.broadcast_rate = args.rate
+    if args.workers is not None:
+        settings.broadcast_workers = args.workers
+    if args.write_behind_ms is not None:
+        settings.write_behind_ms = args.write_behind_ms
+    print(
+        f"broadcast rate {settings.broadcast_rate}/s, {settings.broadcast_workers} workers, "
+        f"fake API {args.api_rate}/s, {'HTTP' if args.http else 'in-process'}"
+    )
+    for users in args.users:
+        await run_size(settings, users, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=lambda v: [int(x) for x in v.split(",")], default=[10_000], help="comma-separated sizes")
+    parser.add_argument("--rate", type=float, default=None, help="override BROADCAST_RATE")
+    parser.add_argument("--workers", type=int, default=None, help="override BROADCAST_WORKERS")
+    parser.add_argument("--write-behind-ms", type=int, default=None, help="override WRITE_BEHIND_MS")
+    parser.add_argument("--api-rate", type=float, default=30.0, help="messages per second the fake API accepts")
+    parser.add_argument("--per-chat-interval", type=float, default=1.0)
+    parser.add_argument("--blocked", type=float, default=0.01, help="share of users that blocked the bot")
+    parser.add_argument("--http", action="store_true", help="serve the fake API on a loopback port")
+    parser.add_argument("--tracemalloc", action="store_true", help="report the Python heap peak (slower)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Replay synthetic update traffic through the real dispatcher, without network access.
+
+    python -m benchmarks.replay --users 5000 --updates 50000 --mix start=1,st=3,pr=3,done=2,cli=2,stats=1
+
+Outgoing Bot API calls go to a session that only records them, and the database is a fresh
+temporary SQLite file, so the numbers cover routing, middlewares, handlers and SQLite.
+"""
+import argparse
+import asyncio
+import dataclasses
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+from aiogram.types import TelegramObject, Update
+
+from app.bootstrap import attach_context
+from app.config import load_settings
+from app.db.db import Database
+from app.db.dedupe import DedupeStore
+from app.db.fsm import SQLiteStorage
+from app.main import _open_database, build_dispatcher
+from app.services.reminders import ReminderService
+from app.services.scheduler import SchedulerService
+
+from ._fake import FakeSession
+
+DEFAULT_MIX = "start=1,st=3,pr=3,done=2,cli=2,stats=1"
+STATES = ("angry", "confused", "anxious", "sad", "tired", "calm", "good")
+FIRST_USER_ID = 100_000
+BOT_ID = 42
+
+
+class HandlerTimer(BaseMiddleware):
+    """Inner middleware collecting raw handler durations for percentiles."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = data["handler"].callback
+        name = f"{callback.__module__.rpartition('.')[2]}.{callback.__qualname__}"
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.samples[name].append(time.perf_counter() - started)
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in ("start", "st", "pr", "done", "cli", "stats"):
+            raise argparse.ArgumentTypeError(f"unknown update kind {kind!r}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+class TrafficGenerator:
+    def __init__(self, db: Database, users: int, mix: Dict[str, float], seed: int) -> None:
+        catalog = db.catalog
+        self.practice_ids = [p.id for p in catalog.active_practices]
+        self.item_ids = list(catalog.checklist_items_by_id)
+        self.users = users
+        self.kinds = list(mix)
+        self.weights = list(mix.values())
+        self.random = random.Random(seed)
+        self.update_id = 0
+
+    def _message(self, user_id: int, text: str) -> Dict[str, Any]:
+        return {
+            "message_id": self.update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+            "text": text,
+        }
+
+    def _callback(self, user_id: int, data: str) -> Dict[str, Any]:
+        message = self._message(user_id, "…")
+        message["from"] = {"id": BOT_ID, "is_bot": True, "first_name": "bot"}
+        return {
+            "id": str(self.update_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+            "chat_instance": str(user_id),
+            "message": message,
+            "data": data,
+        }
+
+    def next(self) -> Tuple[str, Update]:
+        self.update_id += 1
+        rnd = self.random
+        user_id = FIRST_USER_ID + rnd.randrange(self.users)
+        kind = rnd.choices(self.kinds, self.weights)[0]
+        if kind == "start":
+            payload = {"message": self._message(user_id, "/start")}
+        elif kind == "stats":
+            payload = {"message": self._message(user_id, "/stats")}
+        elif kind == "st":
+            payload = {"callback_query": self._callback(user_id, f"st:{rnd.choice(STATES)}")}
+        elif kind == "cli":
+            payload = {"callback_query": self._callback(user_id, f"cli:{rnd.choice(self.item_ids)}")}
+        else:
+            payload = {"callback_query": self._callback(user_id, f"{kind}:{rnd.choice(self.practice_ids)}")}
+        return kind, Update.model_validate({"update_id": self.update_id, **payload})
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    # nearest rank
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def format_table(title: str, samples: Dict[str, List[float]]) -> str:
+    lines = [title, f"  {'name':<40} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+    for name, values in sorted(samples.items(), key=lambda kv: -sum(kv[1])):
+        ordered = sorted(values)
+        lines.append(
+            f"  {name:<40} {len(ordered):>8} "
+            + " ".join(f"{percentile(ordered, q) * 1000:>9.2f}" for q in (50, 95, 99))
+            + f" {ordered[-1] * 1000:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+async def run(args: argparse.Namespace) -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="bot-bench-"))
+    settings = dataclasses.replace(
+        load_settings(),
+        db_path=str(workdir / "bench.db"),
+        # thousands of users share a handful of handlers; the per-user limit is not what is measured
+        throttle_rate=1e9,
+        throttle_burst=1e9,
+        throttle_window=0.0,
+        workers=1,
+    )
+    if args.write_behind_ms is not None:
+        settings.write_behind_ms = args.write_behind_ms
+
+    session = FakeSession(latency=args.api_latency_ms / 1000)
+    bot = Bot(token=f"{BOT_ID}:BENCH", session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    db = _open_database(settings)
+    storage = SQLiteStorage(db, cache_size=settings.fsm_cache_size, ttl=settings.fsm_ttl_seconds, flush_ms=settings.write_behind_ms)
+    dedupe = DedupeStore(db, window=settings.dedupe_window, retention=settings.dedupe_retention_seconds, flush_ms=settings.write_behind_ms)
+    dp = build_dispatcher(settings, storage, dedupe)
+    timer = HandlerTimer()
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+    attach_context(
+        bot,
+        db,
+        SchedulerService(bot=bot, db=db, settings=settings),
+        ReminderService(bot=bot, db=db, settings=settings),
+    )
+    try:
+        await db.init()
+        await dedupe.load()
+        traffic = TrafficGenerator(db, args.users, args.mix, args.seed)
+        updates = [traffic.next() for _ in range(args.updates)]
+        by_kind: Dict[str, List[float]] = defaultdict(list)
+        errors: Counter = Counter()
+        queue = iter(updates)
+
+        async def worker() -> None:
+            for kind, update in queue:
+                started = time.perf_counter()
+                try:
+                    await dp.feed_update(bot, update)
+                except Exception as e:
+                    errors[f"{kind}: {type(e).__name__}: {e}"] += 1
+                by_kind[kind].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        flush_started = time.perf_counter()
+        await storage.close()
+        await dedupe.close()
+        await db.flush()
+        flushed = time.perf_counter() - flush_started
+    finally:
+        await db.close()
+        await bot.session.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        f"{args.updates} updates from {args.users} users, concurrency {args.concurrency}: "
+        f"{elapsed:.2f}s, {args.updates / elapsed:.0f} updates/s (final flush {flushed * 1000:.0f} ms)"
+    )
+    print(format_table("Per update kind (whole update):", by_kind))
+    print(format_table("Per handler:", timer.samples))
+    print("API calls: " + ", ".join(f"{name}={n}" for name, n in session.calls.most_common()))
+    for error, n in errors.most_common(10):
+        print(f"ERROR x{n}: {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=32, help="updates processed at the same time")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"weights per kind, default {DEFAULT_MIX}")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="simulated Bot API round trip")
+    parser.add_argument("--write-behind-ms", type=int, default=None, help="override WRITE_BEHIND_MS")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.db.content import merge
+from app.db.db import Database
+
+
+def test_import_skips_repeated_keys(tmp_path):
+    practice = {"category_code": "calm", "title": "Breathing", "steps": ["in", "out"]}
+    checklist = {"code": "morning", "title": "Morning", "items": ["Water", "Stretch", "Water"]}
+    content = merge([
+        {"categories": [{"code": "calm", "title": "Calm"}], "practices": [practice], "checklists": [checklist]},
+        {"practices": [{**practice, "steps": ["slowly"]}]},
+    ])
+
+    async def scenario() -> None:
+        db = Database(str(tmp_path / "bot.db"))
+        try:
+            await db.init()
+            report = await db.import_content(content)
+            assert report.duplicates == 2
+            assert report.added["practices"] == 1
+            assert report.added["checklist_items"] == 2
+            practices = [p for p in db.catalog.active_practices if p.title == "Breathing"]
+            assert [p.steps_json for p in practices] == ['["slowly"]']
+            assert [i[1] for i in await db.list_checklist_items(1, "morning")] == ["Water", "Stretch"]
+            assert not (await db.import_content(content)).changed
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,111 @@
+import asyncio
+import dataclasses
+import datetime as dt
+
+import pytest
+
+from app.config import Settings
+from app.db.db import Database
+from app.main import _check_settings
+from app.services.broadcast import Broadcaster, Outcome
+from app.services.scheduler import DAILY_RETRY_DELAY, MINUTE_FORMAT, SchedulerService, next_daily_due
+
+
+def _settings(db_path: str) -> Settings:
+    return Settings(bot_token="", admin_ids=[], tz="UTC", db_path=db_path, daily_default_time="09:00")
+
+
+async def _due_user_ids(db: Database, now: dt.datetime) -> list:
+    return [int(row["user_id"]) async for row in db.iter_users_due_daily(now.strftime(MINUTE_FORMAT))]
+
+
+def test_start_after_block_subscribes_again(tmp_path):
+    async def scenario() -> None:
+        settings = _settings(str(tmp_path / "bot.db"))
+        db = Database(settings.db_path)
+        scheduler = SchedulerService(bot=None, db=db, settings=settings)
+        try:
+            await db.init()
+            now = dt.datetime(2024, 5, 1, 12, 0, tzinfo=dt.timezone.utc)
+            await db.upsert_user(1, "a", None)
+            await scheduler._schedule_new_users(now)
+            next_at, _ = next_daily_due(None, None, now, settings)
+            due = dt.datetime.strptime(next_at, MINUTE_FORMAT).replace(tzinfo=dt.timezone.utc)
+            assert await _due_user_ids(db, due) == [1]
+
+            # the push got a 403
+            await db.disable_daily(1)
+            assert await _due_user_ids(db, due) == []
+
+            await db.upsert_user(1, "a", None)
+            await scheduler._schedule_new_users(now)
+            assert await _due_user_ids(db, due) == [1]
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_transient_failure_is_retried_the_same_day(tmp_path):
+    async def scenario() -> None:
+        settings = _settings(str(tmp_path / "bot.db"))
+        db = Database(settings.db_path)
+        scheduler = SchedulerService(bot=None, db=db, settings=settings)
+        try:
+            await db.init()
+            now = dt.datetime(2024, 5, 1, 12, 0, tzinfo=dt.timezone.utc)
+            await db.upsert_user(1, "a", None)
+            await scheduler._schedule_new_users(now)
+            next_at, day = next_daily_due(None, None, now, settings)
+            due = dt.datetime.strptime(next_at, MINUTE_FORMAT).replace(tzinfo=dt.timezone.utc)
+
+            jobs = [job async for job in scheduler._iter_daily_jobs(due, "practice")]
+            assert [job.chat_id for job in jobs] == [1]
+            await scheduler._on_daily_result(jobs[0], Outcome.RETRYABLE)
+            assert await _due_user_ids(db, due) == []
+
+            retry = due + DAILY_RETRY_DELAY
+            jobs = [job async for job in scheduler._iter_daily_jobs(retry, "practice")]
+            assert [job.payload[0] for job in jobs] == [day]
+            await scheduler._on_daily_result(jobs[0], Outcome.SENT)
+            await db.flush()
+            assert await _due_user_ids(db, retry) == []
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_permanent_failure_waits_for_the_next_day(tmp_path):
+    async def scenario() -> None:
+        settings = _settings(str(tmp_path / "bot.db"))
+        db = Database(settings.db_path)
+        scheduler = SchedulerService(bot=None, db=db, settings=settings)
+        try:
+            await db.init()
+            now = dt.datetime(2024, 5, 1, 12, 0, tzinfo=dt.timezone.utc)
+            await db.upsert_user(1, "a", None)
+            await scheduler._schedule_new_users(now)
+            next_at, _ = next_daily_due(None, None, now, settings)
+            due = dt.datetime.strptime(next_at, MINUTE_FORMAT).replace(tzinfo=dt.timezone.utc)
+
+            jobs = [job async for job in scheduler._iter_daily_jobs(due, "practice")]
+            await scheduler._on_daily_result(jobs[0], Outcome.FAILED)
+            assert await _due_user_ids(db, due + DAILY_RETRY_DELAY) == []
+            assert await _due_user_ids(db, due + dt.timedelta(days=1)) == [1]
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_broadcast_burst_is_capped():
+    assert Broadcaster(bot=None, rate=2000)._bucket.capacity == 30
+    assert Broadcaster(bot=None, rate=10)._bucket.capacity == 10
+
+
+def test_broadcast_rate_must_be_positive():
+    with pytest.raises(RuntimeError, match="BROADCAST_RATE"):
+        _check_settings(dataclasses.replace(_settings("bot.db"), bot_token="1:x", broadcast_rate=0))
+    with pytest.raises(ValueError):
+        Broadcaster(bot=None, rate=-5)
@@ -0,0 +1,25 @@
+import asyncio
+
+from app.db.db import Database
+
+
+def test_summary_waits_for_a_running_flush(tmp_path):
+    async def scenario() -> None:
+        db = Database(str(tmp_path / "bot.db"), flush_ms=60_000, summary_ttl=60.0)
+        try:
+            await db.init()
+            await db.upsert_user(1, "a", None)
+            await db.add_points(1, 5)
+            # stall the flush after it took the buffer, so nothing is pending for the user any more
+            async with db._write_lock:
+                flush = asyncio.create_task(db.flush())
+                await asyncio.sleep(0.05)
+                read = asyncio.create_task(db.get_user_summary(1))
+                await asyncio.sleep(0.05)
+            await flush
+            assert (await read).points == 5
+            assert (await db.get_user_summary(1)).points == 5
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())